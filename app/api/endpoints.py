@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from sqlalchemy.orm import Session
-from app import crud, schemas
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+from app import crud, crud_async, huggingface, models, resumidor, schemas, exportacion, expediente, importacion, pdf, trabajos
+from app.db import get_async_db, get_db, get_sessionmaker
 from app.auth import requiere_rol
 import pandas as pd
+from datetime import date
+from typing import Literal, Optional
 from io import BytesIO
+import shutil
+import tempfile
+import zipfile
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-import requests
+from pydantic import BaseModel, Field
 import os
 
 router = APIRouter()
@@ -19,29 +27,102 @@ router = APIRouter()
 @router.get(
     "/causas",
     response_model=list[schemas.CausaOut],
-    summary="Listar todas las causas",
-    description="Devuelve todas las causas registradas. Rol: admin, abogado, supervisor"
+    summary="Listar causas paginadas",
+    description=(
+        "Devuelve una página de causas ordenada por id, con filtros opcionales. "
+        "Si hay más resultados, el encabezado X-Siguiente-Cursor trae el valor "
+        "a enviar como `cursor` para la página siguiente. Rol: admin, abogado, supervisor"
+    )
 )
-def listar_causas(
-    db: Session = Depends(get_db),
+async def listar_causas(
+    response: Response,
+    cursor: Optional[int] = Query(None, description="Último id recibido en la página anterior"),
+    limite: int = Query(100, ge=1, le=1000),
+    tribunal: Optional[str] = None,
+    abogado_responsable: Optional[str] = None,
+    fecha_desde: Optional[date] = None,
+    fecha_hasta: Optional[date] = None,
+    orden: Literal["asc", "desc"] = "asc",
+    db: AsyncSession = Depends(get_async_db),
     usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
 ):
-    return crud.listar_causas(db)
+    causas = await crud_async.listar_causas(
+        db,
+        cursor=cursor,
+        limite=limite + 1,
+        tribunal=tribunal,
+        abogado=abogado_responsable,
+        fecha_desde=fecha_desde,
+        fecha_hasta=fecha_hasta,
+        descendente=orden == "desc",
+    )
+    if len(causas) > limite:
+        causas = causas[:limite]
+        response.headers["X-Siguiente-Cursor"] = str(causas[-1].id)
+    return causas
 
 @router.post(
     "/causas",
     response_model=schemas.CausaOut,
     summary="Crear una nueva causa",
-    description="Crea una causa y genera su checklist base. Rol: admin, abogado"
+    description="Crea una causa y genera su checklist según la plantilla de su tribunal. Rol: admin, abogado"
 )
 def crear_causa(
     causa: schemas.CausaCreate,
     db: Session = Depends(get_db),
     usuario = Depends(requiere_rol(["admin", "abogado"]))
 ):
-    nueva = crud.crear_causa(db, causa)
-    crud.crear_checklist_base(db, nueva.id)
-    return nueva
+    try:
+        return crud.crear_causa_con_checklist(db, causa)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe una causa con ese RIT en el tribunal")
+
+@router.get(
+    "/causas/exportar",
+    summary="Exportar causas con su checklist",
+    description=(
+        "Transmite todas las causas junto a sus tareas en NDJSON (una causa por línea) "
+        "o CSV (una fila por tarea), sin cargar la tabla en memoria. Rol: admin, supervisor"
+    )
+)
+def exportar_causas(
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    fabrica_sesion: sessionmaker = Depends(get_sessionmaker),
+    usuario = Depends(requiere_rol(["admin", "supervisor"]))
+):
+    if formato == "csv":
+        return StreamingResponse(
+            exportacion.generar_csv(fabrica_sesion),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="causas.csv"'},
+        )
+    return StreamingResponse(exportacion.generar_ndjson(fabrica_sesion), media_type="application/x-ndjson")
+
+@router.get(
+    "/causas/buscar",
+    response_model=list[schemas.CausaOut],
+    summary="Buscar causas por texto",
+    description=(
+        "Busca por RIT, representado, tribunal o comentarios de tareas (palabras parciales, "
+        "sin distinguir tildes), ordenando por relevancia. Si hay más resultados, el "
+        "encabezado X-Siguiente-Desplazamiento trae el valor para la página siguiente. "
+        "Rol: admin, abogado, supervisor"
+    )
+)
+async def buscar_causas(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Texto a buscar"),
+    limite: int = Query(20, ge=1, le=100),
+    desplazamiento: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
+):
+    # Una fila de más indica si hay página siguiente sin una consulta de conteo
+    causas = await crud_async.buscar_causas(db, q, limite + 1, desplazamiento)
+    if len(causas) > limite:
+        response.headers["X-Siguiente-Desplazamiento"] = str(desplazamiento + limite)
+    return causas[:limite]
 
 @router.get(
     "/causas/{causa_id}",
@@ -49,12 +130,12 @@ def crear_causa(
     summary="Obtener detalle de una causa",
     description="Recupera una causa por su ID. Rol: admin, abogado, supervisor"
 )
-def obtener_causa(
+async def obtener_causa(
     causa_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
 ):
-    causa = crud.obtener_causa(db, causa_id)
+    causa = await crud_async.obtener_causa(db, causa_id)
     if not causa:
         raise HTTPException(status_code=404, detail="Causa no encontrada")
     return causa
@@ -63,6 +144,35 @@ def obtener_causa(
 # Importar desde Excel
 # ----------------------
 
+def _resultado_importacion(creadas: int, actualizadas: int, errores: list[str], modo: str) -> dict:
+    if errores:
+        detalle = {"creadas": creadas, "errores": errores}
+        if modo == "upsert":
+            detalle["actualizadas"] = actualizadas
+        raise HTTPException(status_code=422, detail=detalle)
+    if modo == "upsert":
+        return {
+            "mensaje": f"Se importaron {creadas} causas nuevas y se actualizaron {actualizadas}",
+            "creadas": creadas,
+            "actualizadas": actualizadas,
+        }
+    return {"mensaje": f"Se importaron {creadas} causas correctamente"}
+
+def _importar_por_bloques(file: UploadFile, db: Session, modo: str) -> tuple[int, int, list[str]]:
+    """Guarda el upload en disco y lo importa por bloques con openpyxl read-only."""
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as destino:
+        shutil.copyfileobj(file.file, destino)
+    try:
+        return importacion.importar_bloques(db, importacion.bloques_xlsx(destino.name, trabajos.TAMANO_BLOQUE), modo)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {e}")
+    finally:
+        os.remove(destino.name)
+
 @router.post(
     "/importar-causas",
     summary="Importar causas desde un archivo Excel",
@@ -70,43 +180,80 @@ def obtener_causa(
 )
 async def importar_causas(
     file: UploadFile = File(...),
+    streaming: bool = Query(False, description="Leer la planilla por bloques desde disco (memoria acotada)"),
+    modo: Literal["crear", "upsert"] = Query("crear", description="upsert: actualiza las causas existentes por RIT y tribunal"),
     db: Session = Depends(get_db),
     usuario = Depends(requiere_rol(["admin", "abogado"]))
 ):
     if not file.filename.endswith(".xlsx"):
         raise HTTPException(status_code=400, detail="El archivo debe ser .xlsx")
 
+    if streaming:
+        creadas, actualizadas, errores = await run_in_threadpool(_importar_por_bloques, file, db, modo)
+        return _resultado_importacion(creadas, actualizadas, errores, modo)
+
     contents = await file.read()
     try:
         df = pd.read_excel(BytesIO(contents))
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"No se pudo leer el archivo: {e}")
 
-    requeridas = ["RIT", "Representado", "Tribunal", "Abogado responsable", "Fecha ingreso"]
-    if not all(col in df.columns for col in requeridas):
+    if importacion.faltan_columnas(df.columns):
         raise HTTPException(status_code=400, detail="Faltan columnas requeridas en la planilla")
 
-    errores = []
-    creadas = 0
-    for idx, row in df.iterrows():
-        try:
-            causa_data = schemas.CausaCreate(
-                rit=str(row["RIT"]),
-                representado=row["Representado"],
-                tribunal=row["Tribunal"],
-                abogado_responsable=row["Abogado responsable"],
-                fecha_ingreso=pd.to_datetime(row["Fecha ingreso"]).date()
-            )
-            nueva = crud.crear_causa(db, causa_data)
-            crud.crear_checklist_base(db, nueva.id)
-            creadas += 1
-        except Exception as e:
-            errores.append(f"Fila {idx+2}: {e}")
-            db.rollback()
+    registros, errores = importacion.validar_planilla(df)
+    try:
+        creadas, actualizadas, errores_guardado = importacion.guardar_registros(db, registros, modo)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=422, detail={"creadas": 0, "errores": errores + [f"No se pudieron guardar las causas: {e}"]})
 
-    if errores:
-        raise HTTPException(status_code=422, detail={"creadas": creadas, "errores": errores})
-    return {"mensaje": f"Se importaron {creadas} causas correctamente"}
+    return _resultado_importacion(creadas, actualizadas, errores + errores_guardado, modo)
+
+@router.post(
+    "/importar-causas/trabajos",
+    response_model=schemas.TrabajoImportacionOut,
+    status_code=202,
+    summary="Importar causas desde Excel en segundo plano",
+    description=(
+        "Guarda el .xlsx y lo importa en un pool de trabajos acotado. Responde de inmediato "
+        "con el id del trabajo; el progreso se consulta en /importar-causas/trabajos/{id}. "
+        "Rol: admin, abogado"
+    )
+)
+def importar_causas_en_segundo_plano(
+    file: UploadFile = File(...),
+    modo: Literal["crear", "upsert"] = Query("crear", description="upsert: actualiza las causas existentes por RIT y tribunal"),
+    fabrica_sesion: sessionmaker = Depends(get_sessionmaker),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    if not file.filename.endswith(".xlsx"):
+        raise HTTPException(status_code=400, detail="El archivo debe ser .xlsx")
+
+    with tempfile.NamedTemporaryFile(suffix=".xlsx", delete=False) as destino:
+        shutil.copyfileobj(file.file, destino)
+    try:
+        trabajo = trabajos.encolar_importacion(fabrica_sesion, destino.name, file.filename, modo)
+    except trabajos.ColaLlena:
+        os.remove(destino.name)
+        raise HTTPException(status_code=429, detail="Hay demasiadas importaciones en curso, intenta más tarde")
+    return trabajos.estado(trabajo)
+
+@router.get(
+    "/importar-causas/trabajos/{trabajo_id}",
+    response_model=schemas.TrabajoImportacionOut,
+    summary="Estado de una importación en segundo plano",
+    description="Filas procesadas, filas con error y throughput del trabajo. Rol: admin, abogado"
+)
+def estado_importacion(
+    trabajo_id: str,
+    db: Session = Depends(get_db),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    trabajo = db.get(models.TrabajoImportacion, trabajo_id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajos.estado(trabajo)
 
 # ----------------------
 # Checklist por Causa
@@ -118,56 +265,314 @@ async def importar_causas(
     summary="Listar checklist de una causa",
     description="Recupera todas las tareas del checklist de una causa. Rol: admin, abogado, supervisor"
 )
-def ver_checklist(
+async def ver_checklist(
     causa_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
 ):
-    tareas = crud.obtener_checklist_por_causa(db, causa_id)
+    tareas = await crud_async.obtener_checklist_por_causa(db, causa_id)
     if not tareas:
         raise HTTPException(status_code=404, detail="No hay checklist para esta causa")
     return tareas
 
+# ----------------------
+# Plantillas de Checklist
+# ----------------------
+
+@router.get(
+    "/plantillas-checklist",
+    response_model=list[schemas.PlantillaChecklistOut],
+    summary="Listar plantillas de checklist",
+    description="Plantillas que se instancian al crear causas, por tribunal. Rol: admin, abogado, supervisor"
+)
+def listar_plantillas(
+    db: Session = Depends(get_db),
+    usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
+):
+    return crud.listar_plantillas(db)
+
+@router.post(
+    "/plantillas-checklist",
+    response_model=schemas.PlantillaChecklistOut,
+    summary="Crear una plantilla de checklist",
+    description="Sin tribunal, la plantilla aplica a los tribunales que no tienen una propia. Rol: admin"
+)
+def crear_plantilla(
+    datos: schemas.PlantillaChecklistCreate,
+    db: Session = Depends(get_db),
+    usuario = Depends(requiere_rol(["admin"]))
+):
+    try:
+        return crud.crear_plantilla(db, datos)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe una plantilla para ese tribunal (o una general, si no se indica tribunal)")
+
+@router.put(
+    "/plantillas-checklist/{plantilla_id}",
+    response_model=schemas.PlantillaChecklistOut,
+    summary="Reemplazar una plantilla de checklist",
+    description="Las causas ya creadas conservan su checklist. Rol: admin"
+)
+def actualizar_plantilla(
+    plantilla_id: int,
+    datos: schemas.PlantillaChecklistCreate,
+    db: Session = Depends(get_db),
+    usuario = Depends(requiere_rol(["admin"]))
+):
+    try:
+        plantilla = crud.actualizar_plantilla(db, plantilla_id, datos)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Ya existe una plantilla para ese tribunal (o una general, si no se indica tribunal)")
+    if not plantilla:
+        raise HTTPException(status_code=404, detail="Plantilla no encontrada")
+    return plantilla
+
+@router.delete(
+    "/plantillas-checklist/{plantilla_id}",
+    status_code=204,
+    summary="Eliminar una plantilla de checklist",
+    description="Rol: admin"
+)
+def eliminar_plantilla(
+    plantilla_id: int,
+    db: Session = Depends(get_db),
+    usuario = Depends(requiere_rol(["admin"]))
+):
+    if not crud.eliminar_plantilla(db, plantilla_id):
+        raise HTTPException(status_code=404, detail="Plantilla no encontrada")
+
 # ----------------------
 # Actualizar Tarea
 # ----------------------
 
+@router.put(
+    "/tareas",
+    response_model=list[schemas.ChecklistTareaOut],
+    summary="Actualizar varias tareas del checklist",
+    description=(
+        "Aplica un lote de actualizaciones (cada tarea por id o por causa_id y tarea_nombre) "
+        "en una sola transacción. Si alguna tarea no existe (404) o aparece más de una vez "
+        "en el lote (422) no se modifica ninguna. "
+        "Rol: admin, abogado"
+    )
+)
+async def actualizar_tareas_lote(
+    lote: schemas.ChecklistTareasLote,
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    tareas, faltantes, repetidas = await crud_async.actualizar_tareas_lote(db, lote.tareas)
+    if faltantes:
+        raise HTTPException(status_code=404, detail={"mensaje": "Tareas no encontradas", "faltantes": faltantes})
+    if repetidas:
+        raise HTTPException(status_code=422, detail={"mensaje": "Tareas repetidas en el lote", "repetidas": repetidas})
+    return tareas
+
 @router.put(
     "/tareas/{tarea_id}",
     response_model=schemas.ChecklistTareaOut,
     summary="Actualizar una tarea del checklist",
     description="Permite marcar completada, añadir comentarios y fecha. Rol: admin, abogado"
 )
-def actualizar_estado_tarea(
+async def actualizar_estado_tarea(
     tarea_id: int,
     datos: schemas.ChecklistTareaUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     usuario = Depends(requiere_rol(["admin", "abogado"]))
 ):
-    tarea = crud.actualizar_tarea(db, tarea_id, datos)
+    tarea = await crud_async.actualizar_tarea(db, tarea_id, datos)
     if not tarea:
         raise HTTPException(status_code=404, detail="Tarea no encontrada")
     return tarea
 
-router = APIRouter()    
+# ----------------------
+# Expediente (ZIP de PDFs)
+# ----------------------
 
-HF_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
-API_URL = "https://api-inference.huggingface.co/models/facebook/bart-large-cnn"
-HEADERS = {"Authorization": f"Bearer {HF_TOKEN}"}
+@router.post(
+    "/causas/{causa_id}/expediente",
+    summary="Cargar un expediente ZIP de PDFs",
+    description=(
+        "Extrae el texto de cada PDF del ZIP en el pool de procesos, lo resume "
+        "(opcional) y lo guarda como documento de la causa. Rol: admin, abogado"
+    )
+)
+async def cargar_expediente(
+    causa_id: int,
+    file: UploadFile = File(...),
+    resumir: bool = Query(True, description="Generar un resumen por documento"),
+    backend: Optional[Literal[resumidor.BACKENDS]] = Query(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)"),
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    if not file.filename.endswith(".zip"):
+        raise HTTPException(status_code=400, detail="El archivo debe ser .zip")
+    if not await crud_async.obtener_causa(db, causa_id):
+        raise HTTPException(status_code=404, detail="Causa no encontrada")
+
+    with tempfile.NamedTemporaryFile(suffix=".zip", delete=False) as destino:
+        await run_in_threadpool(shutil.copyfileobj, file.file, destino)
+    try:
+        documentos, errores = await expediente.procesar_zip(destino.name, resumidor.resumidor_pdf if resumir else None, backend)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="El archivo no es un ZIP válido")
+    finally:
+        os.remove(destino.name)
+
+    guardados = await crud_async.crear_documentos(db, causa_id, documentos)
+    return {
+        "documentos": [schemas.DocumentoOut.model_validate(d) for d in guardados],
+        "errores": errores,
+    }
+
+@router.post(
+    "/causas/{causa_id}/documentos",
+    response_model=schemas.DocumentoOut,
+    summary="Adjuntar un PDF a una causa",
+    description=(
+        "Extrae el texto del PDF, lo resume (opcional) y lo guarda comprimido; un mismo "
+        "texto adjunto a varias causas se almacena una sola vez. Rol: admin, abogado"
+    )
+)
+async def adjuntar_documento(
+    causa_id: int,
+    file: UploadFile = File(...),
+    resumir: bool = Query(True, description="Generar el resumen del documento"),
+    backend: Optional[Literal[resumidor.BACKENDS]] = Query(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)"),
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Solo se permiten archivos PDF")
+    if not await crud_async.obtener_causa(db, causa_id):
+        raise HTTPException(status_code=404, detail="Causa no encontrada")
+    try:
+        texto = await pdf.extraer_texto_async(await file.read())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"No se pudo leer el PDF: {e}")
+
+    resumen = None
+    if resumir:
+        try:
+            resumen = await resumidor.resumir_con_cache(resumidor.elegir(backend, resumidor.resumidor_pdf), texto)
+        except huggingface.ErrorInferencia as e:
+            raise HTTPException(status_code=e.status_code or 502, detail=e.detalle)
+    documentos = await crud_async.crear_documentos(
+        db, causa_id, [{"nombre_archivo": file.filename, "texto": texto, "resumen": resumen}]
+    )
+    return documentos[0]
+
+@router.get(
+    "/causas/{causa_id}/documentos",
+    response_model=list[schemas.DocumentoOut],
+    summary="Listar documentos de una causa",
+    description="Documentos cargados con su resumen. Rol: admin, abogado, supervisor"
+)
+async def listar_documentos(
+    causa_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
+):
+    return await crud_async.listar_documentos(db, causa_id)
+
+@router.get(
+    "/documentos/buscar",
+    response_model=list[schemas.DocumentoOut],
+    summary="Buscar en el texto de los documentos",
+    description=(
+        "Busca en el texto ya extraído de los documentos, ordenando por relevancia; "
+        "opcionalmente sólo en los de una causa. Paginación igual que /causas/buscar. "
+        "Rol: admin, abogado, supervisor"
+    )
+)
+async def buscar_documentos(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Texto a buscar"),
+    causa_id: Optional[int] = None,
+    limite: int = Query(20, ge=1, le=100),
+    desplazamiento: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
+):
+    documentos = await crud_async.buscar_documentos(db, q, limite + 1, desplazamiento, causa_id)
+    if len(documentos) > limite:
+        response.headers["X-Siguiente-Desplazamiento"] = str(desplazamiento + limite)
+    return documentos[:limite]
+
+@router.get(
+    "/documentos/{documento_id}",
+    response_model=schemas.DocumentoTextoOut,
+    summary="Obtener un documento con su texto",
+    description="Texto ya extraído del documento, sin volver a leer el PDF. Rol: admin, abogado, supervisor"
+)
+async def obtener_documento(
+    documento_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado", "supervisor"]))
+):
+    documento = await crud_async.obtener_documento(db, documento_id)
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    return documento
+
+@router.post(
+    "/documentos/{documento_id}/resumen",
+    response_model=schemas.DocumentoOut,
+    summary="Volver a resumir un documento",
+    description=(
+        "Resume el texto guardado (sin volver a leer el PDF) y reemplaza el resumen, que "
+        "comparten todas las causas con el mismo documento. Rol: admin, abogado"
+    )
+)
+async def resumir_documento(
+    documento_id: int,
+    backend: Optional[Literal[resumidor.BACKENDS]] = Query(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)"),
+    db: AsyncSession = Depends(get_async_db),
+    usuario = Depends(requiere_rol(["admin", "abogado"]))
+):
+    documento = await crud_async.obtener_documento(db, documento_id)
+    if not documento:
+        raise HTTPException(status_code=404, detail="Documento no encontrado")
+    try:
+        resumen = await resumidor.resumir_con_cache(resumidor.elegir(backend, resumidor.resumidor_pdf), documento.texto)
+    except huggingface.ErrorInferencia as e:
+        raise HTTPException(status_code=e.status_code or 502, detail=e.detalle)
+    return await crud_async.guardar_resumen_documento(db, documento, resumen)
+
+
+MODELO_RESUMEN = "facebook/bart-large-cnn"
+
+resumidor_texto = resumidor.ResumidorHuggingFace(MODELO_RESUMEN)
 
 class TextoEntrada(BaseModel):
     texto: str
+    backend: Optional[Literal[resumidor.BACKENDS]] = Field(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)")
+
+class LoteTextos(BaseModel):
+    textos: list[str]
+    paralelismo: Optional[int] = Field(None, ge=1, description="Resúmenes simultáneos (máximo RESUMEN_LOTE_PARALELISMO)")
+    backend: Optional[Literal[resumidor.BACKENDS]] = Field(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)")
 
 @router.post("/resumir/")
-def resumir_texto(data: TextoEntrada):
-    payload = {"inputs": data.texto}
-    response = requests.post(API_URL, headers=HEADERS, json=payload)
-
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-
-    resultado = response.json()
-    if isinstance(resultado, list) and "summary_text" in resultado[0]:
-        return {"resumen": resultado[0]["summary_text"]}
-    else:
-        return {"detalle": resultado}
\ No newline at end of file
+async def resumir_texto(data: TextoEntrada):
+    try:
+        resumen = await resumidor.resumir_con_cache(resumidor.elegir(data.backend, resumidor_texto), data.texto)
+    except huggingface.ErrorInferencia as e:
+        raise HTTPException(status_code=e.status_code or 502, detail=e.detalle)
+    return {"resumen": resumen}
+
+@router.post("/resumir/lote", summary="Resumir varios textos en una petición")
+async def resumir_lote(data: LoteTextos):
+    if len(data.textos) > resumidor.RESUMEN_LOTE_MAX:
+        raise HTTPException(status_code=400, detail=f"Se admiten hasta {resumidor.RESUMEN_LOTE_MAX} textos por lote")
+    backend = resumidor.elegir(data.backend, resumidor_texto)
+
+    async def resumir_uno(texto: str) -> dict:
+        try:
+            return {"resumen": await resumidor.resumir_con_cache(backend, texto)}
+        except huggingface.ErrorInferencia as e:
+            return {"error": "Error al generar resumen", "detalle": e.detalle}
+
+    return {"resultados": await resumidor.procesar_en_lote(data.textos, resumir_uno, data.paralelismo)}
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.orm import aliased
 from datetime import date, timedelta
-from app.db import get_db
-from app import models, auth
+from app.db import get_async_db
+from app import models, auth, cumplimiento
 from app.auth import requiere_rol
 
 router = APIRouter()
@@ -11,26 +13,79 @@ router = APIRouter()
 # Métricas de cumplimiento semanal
 # ----------------------
 
+def _semana_actual() -> tuple[date, date]:
+    hoy = date.today()
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    return inicio_semana, inicio_semana + timedelta(days=6)
+
+
+async def _conteos_por_causa(db: AsyncSession, filtro_abogado, inicio_semana: date):
+    """
+    Lee el rollup precalculado (cumplimiento_semanal): total de tareas de cada
+    causa y tareas completadas en la semana de `inicio_semana`.
+    `filtro_abogado` es la condición sobre Causa.abogado_responsable
+    (igualdad o IN).
+    """
+    total = aliased(models.CumplimientoSemanal)
+    semanal = aliased(models.CumplimientoSemanal)
+    consulta = (
+        select(
+            models.Causa.abogado_responsable,
+            models.Causa.rit,
+            models.Causa.representado,
+            func.coalesce(total.total_tareas, 0).label("total"),
+            func.coalesce(semanal.completadas, 0).label("completadas"),
+        )
+        .outerjoin(total, and_(
+            total.causa_id == models.Causa.id,
+            total.semana == cumplimiento.SEMANA_TOTAL,
+        ))
+        .outerjoin(semanal, and_(
+            semanal.causa_id == models.Causa.id,
+            semanal.semana == cumplimiento.semana_iso(inicio_semana),
+        ))
+        .where(filtro_abogado)
+        .order_by(models.Causa.id)
+    )
+    return (await db.execute(consulta)).all()
+
+
+async def _conteos_por_abogado(db: AsyncSession, correos, inicio_semana: date) -> dict:
+    """
+    Totales por abogado agregados en la base sobre el rollup: una fila por
+    abogado (índice abogado_responsable, semana), sin traer las de cada causa.
+    """
+    rollup = models.CumplimientoSemanal
+    semana = cumplimiento.semana_iso(inicio_semana)
+    consulta = (
+        select(
+            rollup.abogado_responsable,
+            func.sum(case((rollup.semana == cumplimiento.SEMANA_TOTAL, rollup.total_tareas), else_=0)).label("total"),
+            func.sum(case((rollup.semana == semana, rollup.completadas), else_=0)).label("completadas"),
+        )
+        .where(rollup.abogado_responsable.in_(correos), rollup.semana.in_([cumplimiento.SEMANA_TOTAL, semana]))
+        .group_by(rollup.abogado_responsable)
+    )
+    return {fila.abogado_responsable: fila for fila in await db.execute(consulta)}
+
+
 @router.get("/metricas/abogado", summary="Reporte personal del abogado")
-def reporte_abogado(
+async def reporte_abogado(
     usuario=Depends(requiere_rol(["abogado"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    hoy = date.today()
-    inicio_semana = hoy - timedelta(days=hoy.weekday())
-    fin_semana = inicio_semana + timedelta(days=6)
+    inicio_semana, fin_semana = _semana_actual()
 
-    causas = db.query(models.Causa).filter(models.Causa.abogado_responsable == usuario.sub).all()
+    filas = await _conteos_por_causa(db, models.Causa.abogado_responsable == usuario.sub, inicio_semana)
     resumen = []
 
-    for causa in causas:
-        tareas = db.query(models.ChecklistTarea).filter(models.ChecklistTarea.causa_id == causa.id).all()
-        total = len(tareas)
-        completadas = sum(1 for t in tareas if t.completada and t.fecha_completada and inicio_semana <= t.fecha_completada <= fin_semana)
+    for fila in filas:
+        total = fila.total
+        completadas = fila.completadas
         pendiente = total - completadas
         resumen.append({
-            "rit": causa.rit,
-            "representado": causa.representado,
+            "rit": fila.rit,
+            "representado": fila.representado,
             "total_tareas": total,
             "completadas_semana": completadas,
             "pendientes": pendiente,
@@ -44,42 +99,55 @@ def reporte_abogado(
     }
 
 @router.get("/metricas/supervision", summary="Reporte supervisor de todos los abogados")
-def reporte_supervision(
+async def reporte_supervision(
+    detalle: bool = Query(True, description="Incluir el desglose por causa de cada abogado (false: sólo totales)"),
     usuario=Depends(requiere_rol(["supervisor", "admin"])),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    hoy = date.today()
-    inicio_semana = hoy - timedelta(days=hoy.weekday())
-    fin_semana = inicio_semana + timedelta(days=6)
+    inicio_semana, fin_semana = _semana_actual()
+
+    abogados = (await db.scalars(select(models.Usuario).where(models.Usuario.rol == "abogado"))).all()
+
+    # Totales de todos los abogados en una sola consulta, agregada por abogado
+    correos = select(models.Usuario.correo).where(models.Usuario.rol == "abogado")
+    totales = await _conteos_por_abogado(db, correos, inicio_semana)
+    detalle_por_abogado: dict[str, list] = {}
+    if detalle:
+        for fila in await _conteos_por_causa(db, models.Causa.abogado_responsable.in_(correos), inicio_semana):
+            detalle_por_abogado.setdefault(fila.abogado_responsable, []).append(
+                {"rit": fila.rit, "completadas": fila.completadas, "total": fila.total}
+            )
 
-    abogados = db.query(models.Usuario).filter(models.Usuario.rol == "abogado").all()
     reportes = []
 
     for ab in abogados:
-        causas = db.query(models.Causa).filter(models.Causa.abogado_responsable == ab.correo).all()
-        completadas_total = 0
-        tareas_total = 0
-        detalle = []
-
-        for causa in causas:
-            tareas = db.query(models.ChecklistTarea).filter(models.ChecklistTarea.causa_id == causa.id).all()
-            completadas = sum(1 for t in tareas if t.completada and t.fecha_completada and inicio_semana <= t.fecha_completada <= fin_semana)
-            detalle.append({"rit": causa.rit, "completadas": completadas, "total": len(tareas)})
-            completadas_total += completadas
-            tareas_total += len(tareas)
+        fila = totales.get(ab.correo)
+        tareas_total = fila.total if fila else 0
+        completadas_total = fila.completadas if fila else 0
 
         porcentaje = round((completadas_total / tareas_total) * 100, 1) if tareas_total else 0
-        reportes.append({
+        reporte = {
             "abogado": ab.nombre_completo,
             "correo": ab.correo,
             "total_tareas": tareas_total,
             "completadas_semana": completadas_total,
             "porcentaje": porcentaje,
-            "detalle": detalle,
             "estado": "✅" if porcentaje == 100 else "🟡" if porcentaje >= 50 else "🔴"
-        })
+        }
+        if detalle:
+            reporte["detalle"] = detalle_por_abogado.get(ab.correo, [])
+        reportes.append(reporte)
 
     return {
         "semana": f"{inicio_semana} a {fin_semana}",
         "resumen": reportes
     }
+
+
+# ----------------------
+# Latencia de hashing de contraseñas
+# ----------------------
+
+@router.get("/metricas/hash", summary="Latencia y carga del hashing de contraseñas")
+def metricas_hash(usuario=Depends(requiere_rol(["admin"]))):
+    return auth.estadisticas_hash()
@@ -1,45 +1,58 @@
-from fastapi import APIRouter, File, UploadFile
-import requests
-from PyPDF2 import PdfReader
-import io
-import os
+from fastapi import APIRouter, File, HTTPException, Query, UploadFile
+from typing import Literal, Optional
+from app import cache_resumen, huggingface, pdf, resumidor
 
 router = APIRouter()
 
-HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
+Backend = Optional[Literal[resumidor.BACKENDS]]
 
-@router.post("/resumen-pdf/")
-async def resumir_pdf(file: UploadFile = File(...)):
+
+async def _resumir_archivo(file: UploadFile, backend: Backend = None) -> dict:
     if not file.filename.endswith(".pdf"):
         return {"error": "Solo se permiten archivos PDF"}
 
-    # Leer el contenido del PDF
+    # Leer el contenido del PDF; la extracción corre en el pool de procesos
     contenido = await file.read()
-    lector_pdf = PdfReader(io.BytesIO(contenido))
-    texto = ""
-    for pagina in lector_pdf.pages:
-        texto += pagina.extract_text() or ""
+    try:
+        texto = await pdf.extraer_texto_async(contenido)
+    except Exception as e:
+        return {"error": "No se pudo leer el PDF", "detalle": str(e)}
 
-    # Acotar el texto si es muy largo (FLAN-T5 tiene límite de tokens)
-    texto = texto[:3000]  # puedes ajustar este límite si quieres
+    # Documentos largos: con Hugging Face se resumen por ventanas en paralelo y luego se combinan
+    try:
+        resumen = await resumidor.resumir_con_cache(resumidor.elegir(backend, resumidor.resumidor_pdf), texto)
+    except huggingface.ErrorInferencia as e:
+        return {"error": "Error al generar resumen", "detalle": e.detalle}
 
-    # Prompt personalizado
-    prompt = f"Resume el siguiente texto legal en 3 puntos clave:\n\n{texto}"
+    return {"resumen": resumen}
 
-    # Enviar al endpoint de Hugging Face
-    headers = {"Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}"}
-    payload = {"inputs": prompt}
 
-    response = requests.post(
-        "https://api-inference.huggingface.co/models/google/flan-t5-base",
-        headers=headers,
-        json=payload
-    )
+@router.post("/resumen-pdf/")
+async def resumir_pdf(
+    file: UploadFile = File(...),
+    backend: Backend = Query(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)"),
+):
+    return await _resumir_archivo(file, backend)
 
-    if response.status_code != 200:
-        return {"error": "Error al generar resumen", "detalle": response.json()}
 
-    resultado = response.json()
-    resumen = resultado[0]["generated_text"]
+@router.post("/resumen-pdf/lote", summary="Resumir varios PDFs en una petición")
+async def resumir_pdf_lote(
+    files: list[UploadFile] = File(...),
+    paralelismo: Optional[int] = Query(None, ge=1, description="Resúmenes simultáneos (máximo RESUMEN_LOTE_PARALELISMO)"),
+    backend: Backend = Query(None, description="huggingface | local (por defecto RESUMIDOR_BACKEND)"),
+):
+    if len(files) > resumidor.RESUMEN_LOTE_MAX:
+        raise HTTPException(status_code=400, detail=f"Se admiten hasta {resumidor.RESUMEN_LOTE_MAX} archivos por lote")
 
-    return {"resumen": resumen}
+    async def resumir_uno(file: UploadFile) -> dict:
+        return {"archivo": file.filename, **await _resumir_archivo(file, backend)}
+
+    def al_fallar(file: UploadFile, error: Exception) -> dict:
+        return {"archivo": file.filename, "error": "Error al generar resumen", "detalle": str(error)}
+
+    return {"resultados": await resumidor.procesar_en_lote(files, resumir_uno, paralelismo, al_fallar)}
+
+
+@router.get("/resumen-cache/estadisticas", summary="Estadísticas de la caché de resúmenes")
+def estadisticas_cache():
+    return cache_resumen.cache.estadisticas()
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import crud, schemas, auth
-from app.db import get_db
+from app import crud, crud_async, schemas, auth
+from app.db import get_async_db, get_db
 from app.auth import TokenData, crear_token_de_acceso
 import uuid
 import datetime
@@ -19,15 +20,15 @@ router = APIRouter()
     summary="Registrar un nuevo usuario",
     description="Crea un usuario en el sistema. Rol requerido: admin"
 )
-def registrar_usuario(
+async def registrar_usuario(
     usuario: schemas.UsuarioCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user=Depends(auth.requiere_rol(["admin"]))
 ):
-    existente = crud.obtener_usuario_por_correo(db, usuario.correo)
+    existente = await crud_async.obtener_usuario_por_correo(db, usuario.correo)
     if existente:
         raise HTTPException(status_code=400, detail="Correo ya registrado")
-    return crud.crear_usuario(db, usuario)
+    return await crud_async.crear_usuario(db, usuario)
 
 @router.post(
     "/login",
@@ -35,12 +36,12 @@ def registrar_usuario(
     summary="Autenticación de usuarios",
     description="Genera un token JWT al validar credenciales"
 )
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    usuario = crud.obtener_usuario_por_correo(db, form_data.username)
-    if not usuario or not auth.verificar_password(form_data.password, usuario.hash_contrasena):
+    usuario = await crud_async.autenticar_usuario(db, form_data.username, form_data.password)
+    if not usuario:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
     token = crear_token_de_acceso({"sub": usuario.correo, "rol": usuario.rol})
     return {"access_token": token, "token_type": "bearer"}
@@ -51,11 +52,27 @@ def login(
     summary="Perfil del usuario autenticado",
     description="Recupera datos del usuario que hizo la petición (token requerido)"
 )
-def leer_perfil(
+async def leer_perfil(
     token_data: TokenData = Depends(auth.obtener_usuario_actual),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
+):
+    usuario = await crud_async.obtener_perfil_por_correo(db, token_data.sub)
+    if usuario is None:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    return usuario
+
+@router.get(
+    "/usuarios/{usuario_id}",
+    response_model=schemas.UsuarioOut,
+    summary="Obtener un usuario",
+    description="Perfil de un usuario por su ID. Rol requerido: admin"
+)
+async def obtener_usuario(
+    usuario_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(auth.requiere_rol(["admin"]))
 ):
-    usuario = crud.obtener_usuario_por_correo(db, token_data.sub)
+    usuario = await crud_async.obtener_perfil(db, usuario_id)
     if usuario is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
     return usuario
@@ -5,13 +5,39 @@ from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from typing import Optional
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import os
+import threading
+import time
 
 # ── Configuración ──────────────────────────────────────────────────────────────
 SECRET_KEY = "clave-secreta-legal"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Costo de bcrypt (log2 de iteraciones). Al cambiarlo, los hashes existentes
+# se rehashean con el nuevo costo en el siguiente login exitoso.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Hilos dedicados a bcrypt (libera el GIL) y operaciones admitidas en espera;
+# pasado ese límite se rechaza con 503 en vez de encolar sin fin.
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+HASH_MAX_PENDIENTES = int(os.getenv("HASH_MAX_PENDIENTES", str(HASH_WORKERS * 16)))
+
+
+def crear_contexto(rounds: int) -> CryptContext:
+    # min = max = rounds: needs_update marca cualquier hash con otro costo, mayor o menor
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+pwd_context = crear_contexto(BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
 # ── Modelos Pydantic ────────────────────────────────────────────────────────────
@@ -20,13 +46,84 @@ class TokenData(BaseModel):
     rol: Optional[str] = None
 
 # ── Funciones de hashing ────────────────────────────────────────────────────────
+class HashSaturado(Exception):
+    """Hay HASH_MAX_PENDIENTES operaciones de hashing en curso o en espera."""
+
+
+_executor_hash = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="hash")
+_lock_hash = threading.Lock()
+_pendientes_hash = 0
+_latencias_hash: deque[float] = deque(maxlen=1000)
+_operaciones_hash = 0
+
+
+def _medir(fn, *args):
+    inicio = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        global _operaciones_hash
+        with _lock_hash:
+            _latencias_hash.append(time.perf_counter() - inicio)
+            _operaciones_hash += 1
+
+
+def _enviar(fn, *args) -> Future:
+    """Encola una operación de bcrypt en el executor dedicado, si no está saturado."""
+    global _pendientes_hash
+    with _lock_hash:
+        if _pendientes_hash >= HASH_MAX_PENDIENTES:
+            raise HashSaturado()
+        _pendientes_hash += 1
+    futuro = _executor_hash.submit(_medir, fn, *args)
+
+    def _liberar(_):
+        global _pendientes_hash
+        with _lock_hash:
+            _pendientes_hash -= 1
+    futuro.add_done_callback(_liberar)
+    return futuro
+
+
 def hash_password(password: str) -> str:
     """Hashea una contraseña en texto plano."""
-    return pwd_context.hash(password)
+    return _enviar(pwd_context.hash, password).result()
 
 def verificar_password(password: str, hashed: str) -> bool:
     """Verifica que la contraseña en texto plano coincida con su hash."""
-    return pwd_context.verify(password, hashed)
+    return _enviar(pwd_context.verify, password, hashed).result()
+
+def verificar_y_actualizar(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    """(válida, nuevo_hash): nuevo_hash no es None si el hash usa otro costo que BCRYPT_ROUNDS."""
+    return _enviar(pwd_context.verify_and_update, password, hashed).result()
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(_enviar(pwd_context.hash, password))
+
+async def verificar_y_actualizar_async(password: str, hashed: str) -> tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(_enviar(pwd_context.verify_and_update, password, hashed))
+
+def estadisticas_hash() -> dict:
+    """Latencia de bcrypt en las últimas 1000 operaciones, sin contar la espera en cola."""
+    with _lock_hash:
+        muestras = sorted(_latencias_hash)
+        operaciones, pendientes = _operaciones_hash, _pendientes_hash
+
+    def percentil(p: float) -> Optional[float]:
+        if not muestras:
+            return None
+        return round(muestras[min(len(muestras) - 1, int(p * len(muestras)))] * 1000, 2)
+
+    return {
+        "rounds": BCRYPT_ROUNDS,
+        "workers": HASH_WORKERS,
+        "pendientes": pendientes,
+        "max_pendientes": HASH_MAX_PENDIENTES,
+        "operaciones": operaciones,
+        "p50_ms": percentil(0.50),
+        "p95_ms": percentil(0.95),
+        "p99_ms": percentil(0.99),
+    }
 
 # ── Funciones JWT ───────────────────────────────────────────────────────────────
 def crear_token_de_acceso(data: dict, expires_delta: timedelta = None) -> str:
@@ -46,19 +143,60 @@ def verificar_token(token: str) -> Optional[dict]:
     except JWTError:
         return None
 
+# ── Caché de tokens verificados ────────────────────────────────────────────────
+# Los clientes reutilizan el mismo token durante toda su vigencia; se guarda el
+# TokenData ya verificado hasta su `exp`, con tope LRU. Sólo se cachean tokens
+# válidos, así que un token inventado siempre paga la verificación completa.
+TOKEN_CACHE_MAX = int(os.getenv("TOKEN_CACHE_MAX", "10000"))
+
+_tokens_verificados: OrderedDict[str, tuple[float, TokenData]] = OrderedDict()
+_lock_tokens = threading.Lock()
+
+
+def _token_cacheado(token: str) -> Optional[TokenData]:
+    with _lock_tokens:
+        entrada = _tokens_verificados.get(token)
+        if entrada is None:
+            return None
+        expira, token_data = entrada
+        if expira <= time.time():
+            del _tokens_verificados[token]
+            return None
+        _tokens_verificados.move_to_end(token)
+        return token_data
+
+
+def _cachear_token(token: str, expira: float, token_data: TokenData):
+    with _lock_tokens:
+        _tokens_verificados[token] = (expira, token_data)
+        _tokens_verificados.move_to_end(token)
+        while len(_tokens_verificados) > TOKEN_CACHE_MAX:
+            _tokens_verificados.popitem(last=False)
+
+
+def limpiar_cache_tokens():
+    with _lock_tokens:
+        _tokens_verificados.clear()
+
 # ── Dependencias de FastAPI ────────────────────────────────────────────────────
 def obtener_usuario_actual(token: str = Depends(oauth2_scheme)) -> TokenData:
     """
     Depende de OAuth2PasswordBearer para extraer el token 'Bearer <token>'.
     Verifica y decodifica el JWT, devolviendo un TokenData con 'sub' y 'rol'.
     Lanza HTTPException(401) si el token es inválido o expirado.
+    Un token ya verificado y vigente se resuelve desde la caché.
     """
+    token_data = _token_cacheado(token)
+    if token_data is not None:
+        return token_data
     payload = verificar_token(token)
     if payload is None:
         raise HTTPException(status_code=401, detail="Token inválido o expirado")
     token_data = TokenData(sub=payload.get("sub"), rol=payload.get("rol"))
     if not token_data.sub or not token_data.rol:
         raise HTTPException(status_code=401, detail="Información de usuario incompleta en token")
+    if isinstance(payload.get("exp"), (int, float)):
+        _cachear_token(token, payload["exp"], token_data)
     return token_data
 
 def requiere_rol(roles_permitidos: list[str]):
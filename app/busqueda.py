@@ -0,0 +1,118 @@
+"""
+Búsqueda de texto completo con FTS5 (sólo SQLite).
+
+causas_fts indexa rit, representado, tribunal y los comentarios de las tareas
+de cada causa, con rowid = causas.id. Los triggers que crea la migración 3 la
+mantienen al día ante cualquier INSERT, UPDATE o DELETE sobre causas y
+checklist_tareas, incluidos los inserts masivos y los upsert de la importación.
+
+contenidos_fts indexa el texto de los documentos, con rowid =
+contenidos_documento.id. Es una tabla contentless (sólo guarda el índice),
+porque el texto ya vive comprimido en contenidos_documento; como un trigger no
+puede descomprimirlo, la alimenta crud.guardar_contenidos.
+
+El tokenizador ignora tildes, así que "gonzalez" encuentra "González", y cada
+palabra de la consulta se busca como prefijo ("gonz" también la encuentra).
+"""
+import re
+import zlib
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+TOKENIZADOR = "unicode61 remove_diacritics 2"
+
+# Pesos de bm25 por columna de causas_fts: rit, representado, tribunal, comentarios
+PESOS_CAUSAS = (10.0, 5.0, 2.0, 1.0)
+
+_COMENTARIOS_DE_LA_CAUSA = (
+    "coalesce((SELECT group_concat(comentarios, ' ') FROM checklist_tareas "
+    "WHERE causa_id = causas_fts.rowid), '')"
+)
+
+DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS causas_fts USING fts5("
+    f"rit, representado, tribunal, comentarios, tokenize = '{TOKENIZADOR}')",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS contenidos_fts USING fts5("
+    f"texto, content = '', tokenize = '{TOKENIZADOR}')",
+    """CREATE TRIGGER IF NOT EXISTS causas_fts_ai AFTER INSERT ON causas BEGIN
+        INSERT INTO causas_fts (rowid, rit, representado, tribunal, comentarios)
+        VALUES (new.id, new.rit, new.representado, new.tribunal, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS causas_fts_au AFTER UPDATE OF rit, representado, tribunal ON causas BEGIN
+        UPDATE causas_fts SET rit = new.rit, representado = new.representado, tribunal = new.tribunal
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS causas_fts_ad AFTER DELETE ON causas BEGIN
+        DELETE FROM causas_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS checklist_fts_ai AFTER INSERT ON checklist_tareas
+    WHEN new.comentarios IS NOT NULL AND new.comentarios != '' BEGIN
+        UPDATE causas_fts SET comentarios = {_COMENTARIOS_DE_LA_CAUSA} WHERE rowid = new.causa_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS checklist_fts_au AFTER UPDATE OF comentarios, causa_id ON checklist_tareas BEGIN
+        UPDATE causas_fts SET comentarios = {_COMENTARIOS_DE_LA_CAUSA} WHERE rowid IN (old.causa_id, new.causa_id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS checklist_fts_ad AFTER DELETE ON checklist_tareas
+    WHEN old.comentarios IS NOT NULL AND old.comentarios != '' BEGIN
+        UPDATE causas_fts SET comentarios = {_COMENTARIOS_DE_LA_CAUSA} WHERE rowid = old.causa_id;
+    END""",
+]
+
+_TOKEN = re.compile(r"\w+")
+
+
+def crear(conn: Connection):
+    """Crea las tablas FTS5 y los triggers, y las puebla desde cero con los datos actuales."""
+    for sentencia in DDL:
+        conn.execute(text(sentencia))
+
+    conn.execute(text("DELETE FROM causas_fts"))
+    conn.execute(text(
+        "INSERT INTO causas_fts (rowid, rit, representado, tribunal, comentarios) "
+        "SELECT c.id, c.rit, c.representado, c.tribunal, "
+        "coalesce((SELECT group_concat(t.comentarios, ' ') FROM checklist_tareas t WHERE t.causa_id = c.id), '') "
+        "FROM causas c"
+    ))
+    conn.execute(text("INSERT INTO contenidos_fts (contenidos_fts) VALUES ('delete-all')"))
+    for contenido_id, comprimido in conn.execute(text("SELECT id, texto_comprimido FROM contenidos_documento")):
+        _insertar_contenido(conn, contenido_id, zlib.decompress(comprimido).decode("utf-8"))
+
+
+def disponible(db: Session) -> bool:
+    """True si la base es SQLite y ya tiene los índices FTS5 (migración 3)."""
+    if db.get_bind().dialect.name != "sqlite":
+        return False
+    return db.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'causas_fts'"
+    )).first() is not None
+
+
+def expresion(consulta: str) -> Optional[str]:
+    """
+    Convierte texto libre en una expresión MATCH segura: cada palabra va entre
+    comillas (sin operadores FTS5) y se busca como prefijo; todas deben estar.
+    Las letras sueltas (la "C" de "C-1234-2025") coinciden con casi todas las
+    filas y encarecen la intersección, así que se omiten si hay otras palabras.
+    """
+    tokens = _TOKEN.findall(consulta)
+    if not tokens:
+        return None
+    if any(len(token) > 1 for token in tokens):
+        tokens = [token for token in tokens if len(token) > 1]
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _insertar_contenido(conn, contenido_id: int, texto: str):
+    conn.execute(
+        text("INSERT INTO contenidos_fts (rowid, texto) VALUES (:id, :texto)"),
+        {"id": contenido_id, "texto": texto},
+    )
+
+
+def indexar_contenidos(db: Session, contenidos: dict[int, str]):
+    """Agrega al índice los contenidos recién creados (id -> texto), en la transacción en curso."""
+    if contenidos and disponible(db):
+        for contenido_id, texto in contenidos.items():
+            _insertar_contenido(db, contenido_id, texto)
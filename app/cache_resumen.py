@@ -0,0 +1,184 @@
+"""
+Caché de resúmenes direccionada por contenido.
+
+La clave es el SHA-256 de (modelo, prompt, texto normalizado), así que un
+mismo escrito subido o pegado varias veces se resume una sola vez. El
+"prompt" es Resumidor.configuracion(): con map-reduce incluye los prompts de
+fragmento y combinación y RESUMEN_VENTANA, que también cambian el resultado.
+Hay dos
+niveles:
+
+- memoria: LRU en proceso (RESUMEN_CACHE_MEMORIA entradas);
+- disco: SQLite (RESUMEN_CACHE_RUTA), compartido entre workers y reinicios,
+  acotado a RESUMEN_CACHE_MAX_DISCO entradas (se eliminan las de acceso más
+  antiguo).
+
+Ambos niveles expiran entradas tras RESUMEN_CACHE_TTL segundos. Las llamadas
+concurrentes con la misma clave esperan un único cálculo.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+RESUMEN_CACHE_RUTA = os.getenv("RESUMEN_CACHE_RUTA", "./resumen_cache.db")
+RESUMEN_CACHE_MEMORIA = int(os.getenv("RESUMEN_CACHE_MEMORIA", "1024"))
+RESUMEN_CACHE_MAX_DISCO = int(os.getenv("RESUMEN_CACHE_MAX_DISCO", "100000"))
+RESUMEN_CACHE_TTL = int(os.getenv("RESUMEN_CACHE_TTL", str(7 * 24 * 3600)))
+
+_ESPACIOS = re.compile(r"\s+")
+
+
+def normalizar(texto: str) -> str:
+    return _ESPACIOS.sub(" ", unicodedata.normalize("NFC", texto)).strip()
+
+
+def clave(modelo: str, prompt: str, texto: str) -> str:
+    contenido = "\x00".join([modelo, prompt, normalizar(texto)])
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+class CacheResumenes:
+    PURGA_CADA = 100   # escrituras entre purgas del nivel de disco
+
+    def __init__(self, ruta: str, max_memoria: int, max_disco: int, ttl: int):
+        self.ruta = ruta
+        self.max_memoria = max_memoria
+        self.max_disco = max_disco
+        self.ttl = ttl
+        self._memoria: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._en_curso: dict[str, asyncio.Future] = {}
+        self._conexion: sqlite3.Connection | None = None
+        self._lock_disco = threading.Lock()
+        self._escrituras = 0
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+    # ── Nivel de disco (se ejecuta en un hilo) ─────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        if self._conexion is None:
+            self._conexion = sqlite3.connect(self.ruta, check_same_thread=False, isolation_level=None)
+            self._conexion.execute("PRAGMA journal_mode=WAL")
+            self._conexion.execute(
+                "CREATE TABLE IF NOT EXISTS resumenes ("
+                "clave TEXT PRIMARY KEY, valor TEXT NOT NULL, creado REAL NOT NULL, accedido REAL NOT NULL)"
+            )
+            self._conexion.execute("CREATE INDEX IF NOT EXISTS ix_resumenes_accedido ON resumenes (accedido)")
+        return self._conexion
+
+    def _leer_disco(self, k: str) -> tuple[float, str] | None:
+        with self._lock_disco:
+            db = self._db()
+            fila = db.execute("SELECT creado, valor FROM resumenes WHERE clave = ?", (k,)).fetchone()
+            if fila is None:
+                return None
+            if time.time() - fila[0] > self.ttl:
+                db.execute("DELETE FROM resumenes WHERE clave = ?", (k,))
+                return None
+            db.execute("UPDATE resumenes SET accedido = ? WHERE clave = ?", (time.time(), k))
+            return fila
+
+    def _escribir_disco(self, k: str, creado: float, valor: str):
+        with self._lock_disco:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO resumenes (clave, valor, creado, accedido) VALUES (?, ?, ?, ?)",
+                (k, valor, creado, creado),
+            )
+            self._escrituras += 1
+            if self._escrituras % self.PURGA_CADA == 0:
+                self._purgar(db)
+
+    def _purgar(self, db: sqlite3.Connection):
+        db.execute("DELETE FROM resumenes WHERE creado < ?", (time.time() - self.ttl,))
+        exceso = db.execute("SELECT COUNT(*) FROM resumenes").fetchone()[0] - self.max_disco
+        if exceso > 0:
+            db.execute(
+                "DELETE FROM resumenes WHERE clave IN (SELECT clave FROM resumenes ORDER BY accedido LIMIT ?)",
+                (exceso,),
+            )
+
+    # ── Nivel de memoria ───────────────────────────────────────────────────────
+    def _leer_memoria(self, k: str) -> str | None:
+        entrada = self._memoria.get(k)
+        if entrada is None:
+            return None
+        if time.time() - entrada[0] > self.ttl:
+            del self._memoria[k]
+            return None
+        self._memoria.move_to_end(k)
+        return entrada[1]
+
+    def _guardar_memoria(self, k: str, creado: float, valor: str):
+        self._memoria[k] = (creado, valor)
+        self._memoria.move_to_end(k)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    # ── API ────────────────────────────────────────────────────────────────────
+    async def obtener_o_calcular(
+        self, modelo: str, prompt: str, texto: str, calcular: Callable[[], Awaitable[str]]
+    ) -> str:
+        """Devuelve el resumen cacheado o ejecuta `calcular` y lo guarda. Los errores no se cachean."""
+        k = clave(modelo, prompt, texto)
+        valor = self._leer_memoria(k)
+        if valor is not None:
+            self.hits_memoria += 1
+            return valor
+
+        en_curso = self._en_curso.get(k)
+        if en_curso is not None:
+            self.hits_memoria += 1
+            return await asyncio.shield(en_curso)
+
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[k] = futuro
+        try:
+            fila = await asyncio.to_thread(self._leer_disco, k)
+            if fila is not None:
+                self.hits_disco += 1
+                creado, valor = fila
+            else:
+                self.misses += 1
+                valor = await calcular()
+                creado = time.time()
+                await asyncio.to_thread(self._escribir_disco, k, creado, valor)
+            self._guardar_memoria(k, creado, valor)
+            futuro.set_result(valor)
+            return valor
+        except asyncio.CancelledError:
+            futuro.cancel()
+            raise
+        except Exception as e:
+            futuro.set_exception(e)
+            futuro.exception()   # evita el aviso de excepción no recuperada si nadie esperaba
+            raise
+        finally:
+            del self._en_curso[k]
+
+    def estadisticas(self) -> dict:
+        consultas = self.hits_memoria + self.hits_disco + self.misses
+        return {
+            "consultas": consultas,
+            "hits_memoria": self.hits_memoria,
+            "hits_disco": self.hits_disco,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits_memoria + self.hits_disco) / consultas, 4) if consultas else 0.0,
+            "entradas_memoria": len(self._memoria),
+        }
+
+    def cerrar(self):
+        with self._lock_disco:
+            if self._conexion is not None:
+                self._conexion.close()
+                self._conexion = None
+
+
+cache = CacheResumenes(RESUMEN_CACHE_RUTA, RESUMEN_CACHE_MEMORIA, RESUMEN_CACHE_MAX_DISCO, RESUMEN_CACHE_TTL)
@@ -0,0 +1,81 @@
+"""
+Caché de perfiles de usuario (schemas.UsuarioOut) por correo y por id.
+
+Es read-through: crud.obtener_perfil_* consulta primero la caché y, si no está,
+lee la base y la completa. crud.crear_usuario, actualizar_usuario y
+actualizar_contrasena invalidan la entrada al escribir, así que un cambio de
+rol o de `activo` se ve en la siguiente lectura del mismo proceso. Entre
+workers distintos no hay invalidación; USUARIOS_CACHE_TTL acota ese desfase.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from app import schemas
+
+USUARIOS_CACHE_TTL = int(os.getenv("USUARIOS_CACHE_TTL", "60"))
+USUARIOS_CACHE_MAX = int(os.getenv("USUARIOS_CACHE_MAX", "10000"))
+
+
+class CacheUsuarios:
+    def __init__(self, ttl: int = USUARIOS_CACHE_TTL, max_entradas: int = USUARIOS_CACHE_MAX):
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        # ("id", 1) y ("correo", "ana@...") apuntan al mismo perfil
+        self._perfiles: OrderedDict[tuple, tuple[float, schemas.UsuarioOut]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def version(self) -> int:
+        """Tomar antes de leer la base y pasar a guardar(): descarta lecturas que cruzaron una invalidación."""
+        with self._lock:
+            return self._version
+
+    def _obtener(self, clave: tuple) -> Optional[schemas.UsuarioOut]:
+        with self._lock:
+            entrada = self._perfiles.get(clave)
+            if entrada is None:
+                return None
+            expira, perfil = entrada
+            if expira <= time.monotonic():
+                del self._perfiles[clave]
+                return None
+            self._perfiles.move_to_end(clave)
+            return perfil
+
+    def por_correo(self, correo: str) -> Optional[schemas.UsuarioOut]:
+        return self._obtener(("correo", correo))
+
+    def por_id(self, usuario_id: int) -> Optional[schemas.UsuarioOut]:
+        return self._obtener(("id", usuario_id))
+
+    def guardar(self, perfil: schemas.UsuarioOut, version: int):
+        with self._lock:
+            if version != self._version:
+                return
+            expira = time.monotonic() + self.ttl
+            for clave in (("id", perfil.id), ("correo", perfil.correo)):
+                self._perfiles[clave] = (expira, perfil)
+                self._perfiles.move_to_end(clave)
+            while len(self._perfiles) > self.max_entradas:
+                self._perfiles.popitem(last=False)
+
+    def invalidar(self, usuario_id: Optional[int] = None, correo: Optional[str] = None):
+        with self._lock:
+            self._version += 1
+            for clave in (("id", usuario_id), ("correo", correo)):
+                entrada = self._perfiles.pop(clave, None)
+                # Quitar también la otra clave del mismo perfil
+                if entrada is not None:
+                    perfil = entrada[1]
+                    self._perfiles.pop(("id", perfil.id), None)
+                    self._perfiles.pop(("correo", perfil.correo), None)
+
+    def limpiar(self):
+        with self._lock:
+            self._version += 1
+            self._perfiles.clear()
+
+
+cache = CacheUsuarios()
@@ -1,14 +1,18 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import Select, and_, insert, or_, select, text, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
 from datetime import date, datetime
-from app import models, schemas, auth
+import hashlib
+import zlib
+from app import models, schemas, auth, busqueda, cache_usuarios, cumplimiento, plantillas
 
 # ════════════════════════════════════════════════
 # 🧑‍⚖️ USUARIOS
 # ════════════════════════════════════════════════
 
-def crear_usuario(db: Session, user_data: schemas.UsuarioCreate) -> models.Usuario:
-    hashed = auth.hash_password(user_data.password)
+def crear_usuario(db: Session, user_data: schemas.UsuarioCreate, hashed: str | None = None) -> models.Usuario:
+    """`hashed`: hash ya calculado (crud_async lo obtiene sin bloquear el event loop)."""
+    hashed = hashed or auth.hash_password(user_data.password)
     user = models.Usuario(
         nombre_completo=user_data.nombre_completo,
         correo=user_data.correo,
@@ -18,6 +22,7 @@ def crear_usuario(db: Session, user_data: schemas.UsuarioCreate) -> models.Usuar
     db.add(user)
     db.commit()
     db.refresh(user)
+    cache_usuarios.cache.invalidar(user.id, user.correo)
     return user
 
 
@@ -26,9 +31,16 @@ def obtener_usuario_por_correo(db: Session, correo: str) -> models.Usuario | Non
 
 
 def autenticar_usuario(db: Session, correo: str, password: str) -> models.Usuario | None:
+    """Verifica la contraseña y, si el hash usa otro costo que BCRYPT_ROUNDS, lo rehashea."""
     user = obtener_usuario_por_correo(db, correo)
-    if not user or not auth.verificar_password(password, user.hashed_password):
+    if not user:
+        return None
+    valida, nuevo_hash = auth.verificar_y_actualizar(password, user.hashed_password)
+    if not valida:
         return None
+    if nuevo_hash:
+        user.hashed_password = nuevo_hash
+        db.commit()
     return user
 
 
@@ -46,6 +58,7 @@ def actualizar_usuario(db: Session, usuario_id: int, activo: bool = None, nuevo_
         user.rol = nuevo_rol
     db.commit()
     db.refresh(user)
+    cache_usuarios.cache.invalidar(user.id, user.correo)
     return user
 
 # ════════════════════════════════════════════════
@@ -60,8 +73,166 @@ def crear_causa(db: Session, causa_data: schemas.CausaCreate):
     return nueva
 
 
-def listar_causas(db: Session):
-    return db.query(models.Causa).all()
+def crear_causa_con_checklist(db: Session, causa_data: schemas.CausaCreate) -> models.Causa:
+    """Crea la causa y su checklist (según plantilla) en una sola transacción."""
+    nueva = models.Causa(**causa_data.dict())
+    db.add(nueva)
+    db.flush()
+    db.execute(insert(models.ChecklistTarea), _filas_checklist(db, [(nueva.id, nueva.tribunal)]))
+    cumplimiento.refrescar(db, [nueva.id])
+    db.commit()
+    return nueva
+
+
+def crear_causas_bulk(db: Session, registros: list[dict]) -> list[int]:
+    """
+    Inserta causas y su checklist (según plantilla) con INSERTs multi-fila en
+    una sola transacción. Devuelve los ids creados, en el orden de `registros`.
+    """
+    if not registros:
+        return []
+    ids = db.scalars(
+        insert(models.Causa).returning(models.Causa.id, sort_by_parameter_order=True),
+        registros,
+    ).all()
+    db.execute(
+        insert(models.ChecklistTarea),
+        _filas_checklist(db, [(causa_id, r["tribunal"]) for causa_id, r in zip(ids, registros)]),
+    )
+    cumplimiento.refrescar(db, ids)
+    db.commit()
+    return ids
+
+
+def causas_existentes(db: Session, claves: list[tuple[str, str]]) -> dict[tuple[str, str], int]:
+    """Mapea (rit, tribunal) -> id para las claves que ya existen (usa ux_causas_rit_tribunal)."""
+    existentes = {}
+    for i in range(0, len(claves), 500):
+        bloque = claves[i:i + 500]
+        filas = db.query(models.Causa.rit, models.Causa.tribunal, models.Causa.id).filter(
+            tuple_(models.Causa.rit, models.Causa.tribunal).in_(bloque)
+        )
+        existentes.update({(rit, tribunal): causa_id for rit, tribunal, causa_id in filas})
+    return existentes
+
+
+def upsert_causas_bulk(db: Session, registros: list[dict]) -> tuple[list[int], list[int]]:
+    """
+    INSERT ... ON CONFLICT (rit, tribunal) DO UPDATE en una sola transacción.
+    Sólo se reescriben las filas cuyos datos cambiaron; las causas nuevas
+    reciben su checklist según plantilla. Devuelve (ids creados, ids actualizados).
+    """
+    if not registros:
+        return [], []
+    existentes = set(causas_existentes(db, [(r["rit"], r["tribunal"]) for r in registros]).values())
+
+    dialecto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    stmt = dialecto.insert(models.Causa)
+    campos = ["representado", "abogado_responsable", "fecha_ingreso"]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["rit", "tribunal"],
+        set_={campo: stmt.excluded[campo] for campo in campos},
+        where=or_(*[getattr(models.Causa, campo).is_distinct_from(stmt.excluded[campo]) for campo in campos]),
+    ).returning(models.Causa.id, models.Causa.tribunal)
+    filas = db.execute(stmt, registros).all()
+    afectadas = [causa_id for causa_id, _ in filas]
+
+    creadas = [causa_id for causa_id in afectadas if causa_id not in existentes]
+    actualizadas = [causa_id for causa_id in afectadas if causa_id in existentes]
+    if creadas:
+        db.execute(
+            insert(models.ChecklistTarea),
+            _filas_checklist(db, [(causa_id, tribunal) for causa_id, tribunal in filas if causa_id not in existentes]),
+        )
+    cumplimiento.refrescar(db, afectadas)
+    db.commit()
+    return creadas, actualizadas
+
+
+def listar_causas(
+    db: Session,
+    cursor: int | None = None,
+    limite: int | None = None,
+    tribunal: str | None = None,
+    abogado: str | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    descendente: bool = False,
+):
+    """
+    Lista causas paginando por keyset sobre `id`: `cursor` es el último id de
+    la página anterior, de modo que el costo de cada página no depende de su
+    profundidad.
+    """
+    return db.scalars(
+        consulta_causas(cursor, limite, tribunal, abogado, fecha_desde, fecha_hasta, descendente)
+    ).all()
+
+
+def consulta_causas(
+    cursor: int | None = None,
+    limite: int | None = None,
+    tribunal: str | None = None,
+    abogado: str | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    descendente: bool = False,
+) -> Select:
+    """El select() de listar_causas, compartido con crud_async.listar_causas."""
+    query = select(models.Causa)
+    if tribunal:
+        query = query.where(models.Causa.tribunal == tribunal)
+    if abogado:
+        query = query.where(models.Causa.abogado_responsable == abogado)
+    if fecha_desde:
+        query = query.where(models.Causa.fecha_ingreso >= fecha_desde)
+    if fecha_hasta:
+        query = query.where(models.Causa.fecha_ingreso <= fecha_hasta)
+    if descendente:
+        if cursor is not None:
+            query = query.where(models.Causa.id < cursor)
+        query = query.order_by(models.Causa.id.desc())
+    else:
+        if cursor is not None:
+            query = query.where(models.Causa.id > cursor)
+        query = query.order_by(models.Causa.id)
+    if limite is not None:
+        query = query.limit(limite)
+    return query
+
+
+def buscar_causas(db: Session, consulta: str, limite: int = 20, desplazamiento: int = 0) -> list[models.Causa]:
+    """
+    Causas que contienen todas las palabras de `consulta` (como prefijo) en rit,
+    representado, tribunal o comentarios de sus tareas, ordenadas por bm25 con
+    índice FTS5 (ver app/busqueda.py). En otras bases se filtra con ILIKE sobre
+    los mismos campos, por subcadena, distinguiendo tildes y ordenando por id.
+    """
+    if busqueda.disponible(db):
+        expresion = busqueda.expresion(consulta)
+        if expresion is None:
+            return []
+        ids = db.execute(
+            text(
+                "SELECT rowid FROM causas_fts WHERE causas_fts MATCH :expresion "
+                f"ORDER BY bm25(causas_fts, {', '.join(map(str, busqueda.PESOS_CAUSAS))}), rowid "
+                "LIMIT :limite OFFSET :desplazamiento"
+            ),
+            {"expresion": expresion, "limite": limite, "desplazamiento": desplazamiento},
+        ).scalars().all()
+        causas = {c.id: c for c in db.query(models.Causa).filter(models.Causa.id.in_(ids))}
+        return [causas[i] for i in ids if i in causas]
+
+    query = db.query(models.Causa)
+    for palabra in consulta.split():
+        patron = f"%{palabra}%"
+        query = query.filter(or_(
+            models.Causa.rit.ilike(patron),
+            models.Causa.representado.ilike(patron),
+            models.Causa.tribunal.ilike(patron),
+            models.Causa.checklist.any(models.ChecklistTarea.comentarios.ilike(patron)),
+        ))
+    return query.order_by(models.Causa.id).offset(desplazamiento).limit(limite).all()
 
 
 def obtener_causa(db: Session, causa_id: int):
@@ -75,23 +246,42 @@ def listar_causas_por_abogado(db: Session, abogado_nombre: str):
 # ✅ TAREAS / CHECKLIST
 # ════════════════════════════════════════════════
 
-def crear_checklist_base(db: Session, causa_id: int):
-    tareas = [
-        "Revisar patrocinio",
-        "Contestación de demanda",
-        "Verificar tramitación"
+# Checklist por defecto cuando no hay plantilla para el tribunal ni plantilla general
+TAREAS_BASE = [
+    "Revisar patrocinio",
+    "Contestación de demanda",
+    "Verificar tramitación"
+]
+
+def tareas_checklist(db: Session, tribunal: str) -> tuple[str, ...]:
+    return plantillas.cache.tareas_para(db, tribunal) or tuple(TAREAS_BASE)
+
+
+def _filas_checklist(db: Session, causas: list[tuple[int, str]]) -> list[dict]:
+    """Filas de checklist_tareas para (causa_id, tribunal), listas para un INSERT masivo."""
+    return [
+        {"causa_id": causa_id, "tarea_nombre": nombre}
+        for causa_id, tribunal in causas
+        for nombre in tareas_checklist(db, tribunal)
     ]
-    for nombre in tareas:
-        tarea = models.ChecklistTarea(
-            causa_id=causa_id,
-            tarea_nombre=nombre
-        )
-        db.add(tarea)
+
+
+def crear_checklist_base(db: Session, causa_id: int, tribunal: str | None = None):
+    if tribunal is None:
+        tribunal = db.get(models.Causa, causa_id).tribunal
+    db.execute(insert(models.ChecklistTarea), _filas_checklist(db, [(causa_id, tribunal)]))
+    cumplimiento.refrescar(db, [causa_id])
     db.commit()
 
 
 def obtener_checklist_por_causa(db: Session, causa_id: int):
-    return db.query(models.ChecklistTarea).filter(models.ChecklistTarea.causa_id == causa_id).all()
+    # Orden de creación, que es el de la plantilla
+    return (
+        db.query(models.ChecklistTarea)
+        .filter(models.ChecklistTarea.causa_id == causa_id)
+        .order_by(models.ChecklistTarea.id)
+        .all()
+    )
 
 
 def actualizar_tarea(db: Session, tarea_id: int, datos: schemas.ChecklistTareaUpdate):
@@ -104,6 +294,7 @@ def actualizar_tarea(db: Session, tarea_id: int, datos: schemas.ChecklistTareaUp
         tarea.fecha_completada = datos.fecha_completada or date.today()
     else:
         tarea.fecha_completada = None
+    cumplimiento.refrescar(db, [tarea.causa_id])
     db.commit()
     db.refresh(tarea)
     return tarea
@@ -124,29 +315,245 @@ def actualizar_tarea_por_nombre(db: Session, causa_id: int, tarea_nombre: str, d
         tarea.fecha_completada = datos.fecha_completada or date.today()
     else:
         tarea.fecha_completada = None
+    cumplimiento.refrescar(db, [tarea.causa_id])
     db.commit()
     db.refresh(tarea)
     return tarea
 
 
+def actualizar_tareas_lote(
+    db: Session, items: list[schemas.ChecklistTareaLoteItem]
+) -> tuple[list[models.ChecklistTarea], list[str], list[str]]:
+    """
+    Aplica un lote de actualizaciones de tareas en una sola transacción:
+    una consulta resuelve las tareas (por id o por causa y nombre, como
+    actualizar_tarea_por_nombre), un único UPDATE por id (executemany) las
+    modifica y el rollup se refresca una vez. Si alguna tarea no existe, o si
+    el lote nombra dos veces la misma (aunque sea una por id y otra por
+    nombre), no se escribe nada y se devuelven sus referencias. Devuelve
+    (tareas, faltantes, repetidas); las tareas en el orden de `items`.
+    """
+    Tarea = models.ChecklistTarea
+    ids = {item.id for item in items if item.id is not None}
+    pares = {(item.causa_id, item.tarea_nombre) for item in items if item.id is None}
+    condiciones = []
+    if ids:
+        condiciones.append(Tarea.id.in_(ids))
+    if pares:
+        condiciones.append(tuple_(Tarea.causa_id, Tarea.tarea_nombre).in_(pares))
+    encontradas = db.query(Tarea.id, Tarea.causa_id, Tarea.tarea_nombre).filter(or_(*condiciones)).order_by(Tarea.id).all()
+    existentes = {fila.id for fila in encontradas}
+    por_nombre = {}
+    for fila in encontradas:
+        por_nombre.setdefault((fila.causa_id, fila.tarea_nombre), fila.id)
+    causa_de = {fila.id: fila.causa_id for fila in encontradas}
+
+    faltantes, repetidas, valores_por_tarea = [], [], {}
+    for item in items:
+        referencia = f"tarea {item.id}" if item.id is not None else f"'{item.tarea_nombre}' de la causa {item.causa_id}"
+        tarea_id = item.id if item.id is not None else por_nombre.get((item.causa_id, item.tarea_nombre))
+        if tarea_id is None or tarea_id not in existentes:
+            faltantes.append(referencia)
+            continue
+        if tarea_id in valores_por_tarea:
+            repetidas.append(referencia)
+            continue
+        fecha = (item.fecha_completada or date.today()) if item.completada else None
+        valores_por_tarea[tarea_id] = (item.completada, item.comentarios, fecha)
+    if faltantes or repetidas:
+        return [], faltantes, repetidas
+
+    # UPDATE por clave primaria: una sola sentencia ejecutada con executemany
+    db.execute(update(Tarea), [
+        {"id": tarea_id, "completada": completada, "comentarios": comentarios, "fecha_completada": fecha}
+        for tarea_id, (completada, comentarios, fecha) in valores_por_tarea.items()
+    ])
+    cumplimiento.refrescar(db, sorted({causa_de[tarea_id] for tarea_id in valores_por_tarea}))
+    db.commit()
+
+    actualizadas = {t.id: t for t in db.query(Tarea).filter(Tarea.id.in_(valores_por_tarea))}
+    return [actualizadas[tarea_id] for tarea_id in valores_por_tarea], [], []
+
+
 def filtrar_tareas(db: Session, abogado: str | None = None, causa_id: int | None = None, completada: bool | None = None):
-    query = db.query(models.ChecklistTarea).join(models.Causa)
+    return db.scalars(consulta_tareas(abogado, causa_id, completada)).all()
+
+
+def consulta_tareas(abogado: str | None = None, causa_id: int | None = None, completada: bool | None = None) -> Select:
+    """El select() de filtrar_tareas, compartido con crud_async.filtrar_tareas."""
+    query = select(models.ChecklistTarea).join(models.Causa)
     if abogado:
-        query = query.filter(models.Causa.abogado_responsable == abogado)
+        query = query.where(models.Causa.abogado_responsable == abogado)
     if causa_id:
-        query = query.filter(models.ChecklistTarea.causa_id == causa_id)
+        query = query.where(models.ChecklistTarea.causa_id == causa_id)
     if completada is not None:
-        query = query.filter(models.ChecklistTarea.completada == completada)
-    return query.all()
+        query = query.where(models.ChecklistTarea.completada == completada)
+    return query
 
 
 def tareas_por_abogado(db: Session, abogado_nombre: str):
-    return (
-        db.query(models.ChecklistTarea)
-        .join(models.Causa)
-        .filter(models.Causa.abogado_responsable == abogado_nombre)
-        .all()
+    return filtrar_tareas(db, abogado=abogado_nombre)
+
+# ════════════════════════════════════════════════
+# 📋 PLANTILLAS DE CHECKLIST
+# ════════════════════════════════════════════════
+
+def listar_plantillas(db: Session):
+    return db.query(models.PlantillaChecklist).order_by(models.PlantillaChecklist.id).all()
+
+
+def _asignar_tareas(plantilla: models.PlantillaChecklist, tareas: list[str]):
+    plantilla.tareas_plantilla = [
+        models.PlantillaTarea(orden=orden, tarea_nombre=nombre) for orden, nombre in enumerate(tareas)
+    ]
+
+
+def crear_plantilla(db: Session, datos: schemas.PlantillaChecklistCreate) -> models.PlantillaChecklist:
+    plantilla = models.PlantillaChecklist(nombre=datos.nombre, tribunal=datos.tribunal)
+    _asignar_tareas(plantilla, datos.tareas)
+    db.add(plantilla)
+    db.commit()
+    plantillas.cache.invalidar()
+    return plantilla
+
+
+def actualizar_plantilla(db: Session, plantilla_id: int, datos: schemas.PlantillaChecklistCreate):
+    """Reemplaza nombre, tribunal y tareas. Las causas ya creadas conservan su checklist."""
+    plantilla = db.get(models.PlantillaChecklist, plantilla_id)
+    if not plantilla:
+        return None
+    plantilla.nombre = datos.nombre
+    plantilla.tribunal = datos.tribunal
+    _asignar_tareas(plantilla, datos.tareas)
+    db.commit()
+    plantillas.cache.invalidar()
+    return plantilla
+
+
+def eliminar_plantilla(db: Session, plantilla_id: int) -> bool:
+    plantilla = db.get(models.PlantillaChecklist, plantilla_id)
+    if not plantilla:
+        return False
+    db.delete(plantilla)
+    db.commit()
+    plantillas.cache.invalidar()
+    return True
+
+# ════════════════════════════════════════════════
+# 📄 DOCUMENTOS
+# ════════════════════════════════════════════════
+
+def hash_texto(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def guardar_contenidos(db: Session, textos: dict[str, str], resumenes: dict[str, str] = None) -> dict[str, models.ContenidoDocumento]:
+    """
+    Asegura un ContenidoDocumento por hash (textos: hash -> texto) y devuelve
+    hash -> contenido. Los contenidos ya guardados no se vuelven a comprimir;
+    si no tenían resumen, se completa con el de ``resumenes``.
+    """
+    resumenes = resumenes or {}
+    existentes = {
+        c.hash: c for c in db.query(models.ContenidoDocumento).filter(models.ContenidoDocumento.hash.in_(list(textos)))
+    }
+    for h, contenido in existentes.items():
+        if contenido.resumen is None and resumenes.get(h):
+            contenido.resumen = resumenes[h]
+
+    nuevos = [h for h in textos if h not in existentes]
+    if nuevos:
+        # ON CONFLICT DO NOTHING: otra petición pudo guardar el mismo contenido en paralelo
+        dialecto = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        insertados = db.execute(
+            dialecto.insert(models.ContenidoDocumento)
+            .on_conflict_do_nothing(index_elements=["hash"])
+            .returning(models.ContenidoDocumento.id, models.ContenidoDocumento.hash),
+            [
+                {
+                    "hash": h,
+                    "texto_comprimido": zlib.compress(textos[h].encode("utf-8")),
+                    "tamano": len(textos[h]),
+                    "resumen": resumenes.get(h),
+                    "fecha_creacion": datetime.utcnow(),
+                }
+                for h in nuevos
+            ],
+        ).all()
+        busqueda.indexar_contenidos(db, {contenido_id: textos[h] for contenido_id, h in insertados})
+        existentes.update(
+            (c.hash, c)
+            for c in db.query(models.ContenidoDocumento).filter(models.ContenidoDocumento.hash.in_(nuevos))
+        )
+    return existentes
+
+
+def crear_documentos(db: Session, causa_id: int, documentos: list[dict]) -> list[models.Documento]:
+    """Guarda documentos (nombre_archivo, texto, resumen) de una causa en una sola transacción."""
+    hashes = [hash_texto(d["texto"]) for d in documentos]
+    contenidos = guardar_contenidos(
+        db,
+        {h: d["texto"] for h, d in zip(hashes, documentos)},
+        {h: d["resumen"] for h, d in zip(hashes, documentos) if d.get("resumen")},
     )
+    nuevos = [
+        models.Documento(causa_id=causa_id, contenido=contenidos[h], nombre_archivo=d["nombre_archivo"])
+        for h, d in zip(hashes, documentos)
+    ]
+    db.add_all(nuevos)
+    db.commit()
+    return nuevos
+
+
+def obtener_documento(db: Session, documento_id: int):
+    return db.get(models.Documento, documento_id)
+
+
+def guardar_resumen_documento(db: Session, documento: models.Documento, resumen: str):
+    """El resumen vive en el contenido, así que vale para todas las causas que comparten el documento."""
+    documento.contenido.resumen = resumen
+    db.commit()
+    return documento
+
+
+def buscar_documentos(
+    db: Session,
+    consulta: str,
+    limite: int = 20,
+    desplazamiento: int = 0,
+    causa_id: int | None = None,
+) -> list[models.Documento]:
+    """
+    Documentos cuyo texto contiene todas las palabras de `consulta`, ordenados
+    por bm25 sobre contenidos_fts, sin descomprimir ni volver a leer PDFs. En
+    otras bases sólo se busca en el nombre del archivo.
+    """
+    if busqueda.disponible(db):
+        expresion = busqueda.expresion(consulta)
+        if expresion is None:
+            return []
+        filtro_causa = "AND d.causa_id = :causa_id " if causa_id is not None else ""
+        ids = db.execute(
+            text(
+                "SELECT d.id FROM contenidos_fts f JOIN documentos d ON d.contenido_id = f.rowid "
+                f"WHERE contenidos_fts MATCH :expresion {filtro_causa}"
+                "ORDER BY f.rank, d.id LIMIT :limite OFFSET :desplazamiento"
+            ),
+            {"expresion": expresion, "causa_id": causa_id, "limite": limite, "desplazamiento": desplazamiento},
+        ).scalars().all()
+        documentos = {d.id: d for d in db.query(models.Documento).filter(models.Documento.id.in_(ids))}
+        return [documentos[i] for i in ids if i in documentos]
+
+    query = db.query(models.Documento)
+    if causa_id is not None:
+        query = query.filter(models.Documento.causa_id == causa_id)
+    for palabra in consulta.split():
+        query = query.filter(models.Documento.nombre_archivo.ilike(f"%{palabra}%"))
+    return query.order_by(models.Documento.id).offset(desplazamiento).limit(limite).all()
+
+
+def listar_documentos(db: Session, causa_id: int):
+    return db.query(models.Documento).filter(models.Documento.causa_id == causa_id).order_by(models.Documento.id).all()
 
 # ════════════════════════════════════════════════
 # 🔒 RECUPERACIÓN DE CONTRASEÑA
@@ -174,6 +581,7 @@ def actualizar_contrasena(db: Session, user_id: int, new_password: str):
         usuario.hashed_password = auth.hash_password(new_password)
         db.commit()
         db.refresh(usuario)
+        cache_usuarios.cache.invalidar(usuario.id, usuario.correo)
     return usuario
 
 
@@ -0,0 +1,175 @@
+"""
+Versiones async de las funciones de crud, para routers con AsyncSession.
+
+Las lecturas se escriben con select(); las escrituras reutilizan la lógica de
+crud (rollup de cumplimiento incluido) mediante AsyncSession.run_sync, que
+las ejecuta sobre la sesión síncrona subyacente sin bloquear el event loop.
+"""
+from datetime import date
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import auth, cache_usuarios, crud, models, schemas
+
+# ════════════════════════════════════════════════
+# 🧑‍⚖️ USUARIOS
+# ════════════════════════════════════════════════
+
+async def crear_usuario(db: AsyncSession, user_data: schemas.UsuarioCreate) -> models.Usuario:
+    """Como crud.crear_usuario, esperando a bcrypt sin bloquear el event loop."""
+    hashed = await auth.hash_password_async(user_data.password)
+    return await db.run_sync(crud.crear_usuario, user_data, hashed)
+
+
+async def obtener_usuario_por_correo(db: AsyncSession, correo: str) -> models.Usuario | None:
+    return await db.scalar(select(models.Usuario).where(models.Usuario.correo == correo).limit(1))
+
+
+async def obtener_perfil_por_correo(db: AsyncSession, correo: str) -> schemas.UsuarioOut | None:
+    """Perfil del usuario; sólo va a la base si no está vigente en cache_usuarios."""
+    perfil = cache_usuarios.cache.por_correo(correo)
+    if perfil is None:
+        version = cache_usuarios.cache.version()
+        user = await obtener_usuario_por_correo(db, correo)
+        if user is None:
+            return None
+        perfil = schemas.UsuarioOut.model_validate(user)
+        cache_usuarios.cache.guardar(perfil, version)
+    return perfil
+
+
+async def obtener_perfil(db: AsyncSession, usuario_id: int) -> schemas.UsuarioOut | None:
+    perfil = cache_usuarios.cache.por_id(usuario_id)
+    if perfil is None:
+        version = cache_usuarios.cache.version()
+        user = await db.get(models.Usuario, usuario_id)
+        if user is None:
+            return None
+        perfil = schemas.UsuarioOut.model_validate(user)
+        cache_usuarios.cache.guardar(perfil, version)
+    return perfil
+
+
+async def autenticar_usuario(db: AsyncSession, correo: str, password: str) -> models.Usuario | None:
+    """Como crud.autenticar_usuario, esperando a bcrypt sin bloquear el event loop."""
+    user = await obtener_usuario_por_correo(db, correo)
+    if not user:
+        return None
+    valida, nuevo_hash = await auth.verificar_y_actualizar_async(password, user.hashed_password)
+    if not valida:
+        return None
+    if nuevo_hash:
+        user.hashed_password = nuevo_hash
+        await db.commit()
+    return user
+
+
+async def listar_usuarios(db: AsyncSession):
+    return (await db.scalars(select(models.Usuario))).all()
+
+
+async def actualizar_usuario(db: AsyncSession, usuario_id: int, activo: bool = None, nuevo_rol: str = None):
+    return await db.run_sync(crud.actualizar_usuario, usuario_id, activo, nuevo_rol)
+
+# ════════════════════════════════════════════════
+# 📂 CAUSAS
+# ════════════════════════════════════════════════
+
+async def crear_causa(db: AsyncSession, causa_data: schemas.CausaCreate):
+    return await db.run_sync(crud.crear_causa, causa_data)
+
+
+async def listar_causas(
+    db: AsyncSession,
+    cursor: int | None = None,
+    limite: int | None = None,
+    tribunal: str | None = None,
+    abogado: str | None = None,
+    fecha_desde: date | None = None,
+    fecha_hasta: date | None = None,
+    descendente: bool = False,
+):
+    """Misma paginación keyset que crud.listar_causas."""
+    return (await db.scalars(
+        crud.consulta_causas(cursor, limite, tribunal, abogado, fecha_desde, fecha_hasta, descendente)
+    )).all()
+
+
+async def obtener_causa(db: AsyncSession, causa_id: int):
+    return await db.get(models.Causa, causa_id)
+
+
+async def buscar_causas(db: AsyncSession, consulta: str, limite: int = 20, desplazamiento: int = 0):
+    return await db.run_sync(crud.buscar_causas, consulta, limite, desplazamiento)
+
+
+async def listar_causas_por_abogado(db: AsyncSession, abogado_nombre: str):
+    return (await db.scalars(
+        select(models.Causa).where(models.Causa.abogado_responsable == abogado_nombre)
+    )).all()
+
+# ════════════════════════════════════════════════
+# ✅ TAREAS / CHECKLIST
+# ════════════════════════════════════════════════
+
+async def crear_checklist_base(db: AsyncSession, causa_id: int, tribunal: str | None = None):
+    return await db.run_sync(crud.crear_checklist_base, causa_id, tribunal)
+
+
+async def obtener_checklist_por_causa(db: AsyncSession, causa_id: int):
+    return (await db.scalars(
+        select(models.ChecklistTarea)
+        .where(models.ChecklistTarea.causa_id == causa_id)
+        .order_by(models.ChecklistTarea.id)
+    )).all()
+
+
+async def actualizar_tarea(db: AsyncSession, tarea_id: int, datos: schemas.ChecklistTareaUpdate):
+    return await db.run_sync(crud.actualizar_tarea, tarea_id, datos)
+
+
+async def actualizar_tarea_por_nombre(db: AsyncSession, causa_id: int, tarea_nombre: str, datos: schemas.ChecklistTareaUpdate):
+    return await db.run_sync(crud.actualizar_tarea_por_nombre, causa_id, tarea_nombre, datos)
+
+
+async def actualizar_tareas_lote(db: AsyncSession, items: list[schemas.ChecklistTareaLoteItem]):
+    return await db.run_sync(crud.actualizar_tareas_lote, items)
+
+
+async def filtrar_tareas(db: AsyncSession, abogado: str | None = None, causa_id: int | None = None, completada: bool | None = None):
+    return (await db.scalars(crud.consulta_tareas(abogado, causa_id, completada))).all()
+
+
+async def tareas_por_abogado(db: AsyncSession, abogado_nombre: str):
+    return await filtrar_tareas(db, abogado=abogado_nombre)
+
+# ════════════════════════════════════════════════
+# 📄 DOCUMENTOS
+# ════════════════════════════════════════════════
+
+async def crear_documentos(db: AsyncSession, causa_id: int, documentos: list[dict]):
+    return await db.run_sync(crud.crear_documentos, causa_id, documentos)
+
+
+async def obtener_documento(db: AsyncSession, documento_id: int):
+    return await db.get(models.Documento, documento_id)
+
+
+async def guardar_resumen_documento(db: AsyncSession, documento: models.Documento, resumen: str):
+    return await db.run_sync(crud.guardar_resumen_documento, documento, resumen)
+
+
+async def buscar_documentos(
+    db: AsyncSession,
+    consulta: str,
+    limite: int = 20,
+    desplazamiento: int = 0,
+    causa_id: int | None = None,
+):
+    return await db.run_sync(crud.buscar_documentos, consulta, limite, desplazamiento, causa_id)
+
+
+async def listar_documentos(db: AsyncSession, causa_id: int):
+    return (await db.scalars(
+        select(models.Documento).where(models.Documento.causa_id == causa_id).order_by(models.Documento.id)
+    )).all()
+
@@ -0,0 +1,112 @@
+"""
+Rollup semanal de cumplimiento (tabla cumplimiento_semanal).
+
+Las funciones de crud que modifican tareas llaman a `refrescar` antes de su
+commit, de modo que el rollup queda en la misma transacción. `reconstruir`
+recalcula la tabla completa (backfill):
+
+    python -m app.cumplimiento
+"""
+from datetime import date
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.orm import Session
+from app import models
+
+SEMANA_TOTAL = "total"
+LOTE_CAUSAS = 500
+
+
+def semana_iso(fecha: date) -> str:
+    """Clave de semana ISO, p.ej. 2025-W22."""
+    anio, semana, _ = fecha.isocalendar()
+    return f"{anio}-W{semana:02d}"
+
+
+def _calcular_filas(db: Session, filtro=None) -> list[dict]:
+    totales = (
+        select(
+            models.Causa.id,
+            models.Causa.abogado_responsable,
+            func.count(models.ChecklistTarea.id),
+            func.coalesce(func.sum(case((models.ChecklistTarea.completada.is_(True), 1), else_=0)), 0),
+        )
+        .outerjoin(models.ChecklistTarea, models.ChecklistTarea.causa_id == models.Causa.id)
+        .group_by(models.Causa.id)
+    )
+    por_fecha = (
+        select(
+            models.ChecklistTarea.causa_id,
+            models.ChecklistTarea.fecha_completada,
+            func.count(models.ChecklistTarea.id),
+        )
+        .where(
+            models.ChecklistTarea.completada.is_(True),
+            models.ChecklistTarea.fecha_completada.is_not(None),
+        )
+        .group_by(models.ChecklistTarea.causa_id, models.ChecklistTarea.fecha_completada)
+    )
+    if filtro is not None:
+        totales = totales.where(models.Causa.id.in_(filtro))
+        por_fecha = por_fecha.where(models.ChecklistTarea.causa_id.in_(filtro))
+
+    filas: dict[tuple[int, str], dict] = {}
+    abogados: dict[int, str] = {}
+    for causa_id, abogado, total, completadas in db.execute(totales):
+        abogados[causa_id] = abogado
+        filas[(causa_id, SEMANA_TOTAL)] = {
+            "abogado_responsable": abogado,
+            "causa_id": causa_id,
+            "semana": SEMANA_TOTAL,
+            "total_tareas": total,
+            "completadas": completadas,
+        }
+    for causa_id, fecha, cantidad in db.execute(por_fecha):
+        if causa_id not in abogados:
+            continue
+        clave = (causa_id, semana_iso(fecha))
+        fila = filas.setdefault(clave, {
+            "abogado_responsable": abogados[causa_id],
+            "causa_id": causa_id,
+            "semana": clave[1],
+            "total_tareas": filas[(causa_id, SEMANA_TOTAL)]["total_tareas"],
+            "completadas": 0,
+        })
+        fila["completadas"] += cantidad
+    return list(filas.values())
+
+
+def refrescar(db: Session, causa_ids) -> None:
+    """Recalcula el rollup de las causas indicadas. No hace commit."""
+    causa_ids = sorted(set(causa_ids))
+    if not causa_ids:
+        return
+    db.flush()
+    tabla = models.CumplimientoSemanal
+    # Por bloques, para no exceder el límite de parámetros de SQLite
+    for i in range(0, len(causa_ids), LOTE_CAUSAS):
+        bloque = causa_ids[i:i + LOTE_CAUSAS]
+        db.execute(delete(tabla).where(tabla.causa_id.in_(bloque)))
+        filas = _calcular_filas(db, bloque)
+        if filas:
+            db.execute(insert(tabla), filas)
+
+
+def reconstruir(db: Session) -> int:
+    """Reconstruye el rollup completo desde checklist_tareas y hace commit."""
+    db.execute(delete(models.CumplimientoSemanal))
+    filas = _calcular_filas(db)
+    if filas:
+        db.execute(insert(models.CumplimientoSemanal), filas)
+    db.commit()
+    return len(filas)
+
+
+if __name__ == "__main__":
+    from app.db import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"Rollup reconstruido: {reconstruir(db)} filas")
+    finally:
+        db.close()
@@ -1,18 +1,114 @@
-from sqlalchemy import create_engine
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-DATABASE_URL = "sqlite:///./iuri.db"
+load_dotenv()
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# ── Configuración ──────────────────────────────────────────────────────────────
+# DATABASE_URL acepta cualquier URL de SQLAlchemy (sqlite:///..., postgresql://...)
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./iuri.db")
+# Versión async de la misma base; por defecto se deriva de DATABASE_URL
+# (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg). El engine
+# async se crea con la primera petición que lo usa, así que con otro motor sin
+# ASYNC_DATABASE_URL la app, las migraciones y las rutas síncronas funcionan
+# igual y sólo fallan las rutas async.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# SQLite: se aplican como PRAGMA en cada conexión nueva
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Otros motores (PostgreSQL): pool de conexiones
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "si", "yes")
+
+
+def _pragmas_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
+def crear_engine(url: str) -> Engine:
+    """
+    Crea el engine según el motor. En SQLite activa WAL (lectores concurrentes
+    con un escritor), synchronous=NORMAL, busy_timeout y mmap en cada conexión;
+    en el resto configura el pool (tamaño, overflow, pre-ping y reciclado).
+    """
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        event.listen(engine, "connect", _pragmas_sqlite)
+        return engine
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+DRIVERS_ASYNC = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def url_async(url: str) -> str:
+    """Traduce una URL síncrona a su driver async equivalente."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in DRIVERS_ASYNC:
+        raise ValueError(f"No hay driver async configurado para {backend}; defina ASYNC_DATABASE_URL")
+    return url.set(drivername=f"{backend}+{DRIVERS_ASYNC[backend]}").render_as_string(hide_password=False)
+
+
+def crear_engine_async(url: str) -> AsyncEngine:
+    """Igual que crear_engine, para AsyncSession (aiosqlite / asyncpg)."""
+    if make_url(url).get_backend_name() == "sqlite":
+        engine = create_async_engine(url, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000})
+        event.listen(engine.sync_engine, "connect", _pragmas_sqlite)
+        return engine
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+
+
+engine = crear_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
-# app/db.py
 
-from sqlalchemy.orm import Session
-from fastapi import Depends
+_async_sessionmaker: async_sessionmaker | None = None
+
+
+def obtener_async_sessionmaker() -> async_sessionmaker:
+    """Crea el engine async la primera vez (ver ASYNC_DATABASE_URL)."""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        async_engine = crear_engine_async(ASYNC_DATABASE_URL or url_async(DATABASE_URL))
+        # expire_on_commit=False: tras el commit no se puede hacer lazy-load fuera del event loop
+        _async_sessionmaker = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
 
-# ya tenés esto definido arriba
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
     db = SessionLocal()
@@ -20,3 +116,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with obtener_async_sessionmaker()() as db:
+        yield db
+
+def get_sessionmaker():
+    """
+    Fábrica de sesiones para respuestas en streaming: el generador abre y
+    cierra su propia sesión, ya que la de get_db se cierra antes de enviar
+    el cuerpo de la respuesta.
+    """
+    return SessionLocal
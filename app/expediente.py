@@ -0,0 +1,108 @@
+"""
+Ingesta de expedientes en ZIP: extrae el texto de cada PDF en el pool de
+procesos de app/pdf.py (un proceso por core), resume los textos y los guarda
+como Documento de la causa (texto comprimido y deduplicado por hash, ver
+crud.crear_documentos).
+
+Los miembros del ZIP se leen sólo cuando les toca y hay un número acotado de
+PDFs en vuelo (dos por proceso): la concurrencia está acotada, y los bytes de
+cada PDF se liberan al extraerlo. Los textos extraídos, en cambio, se juntan
+para guardarlos en una sola llamada a crud.crear_documentos, así que la
+memoria crece con el texto total del expediente.
+
+También se puede usar por línea de comandos:
+
+    python -m app.expediente <causa_id> <expediente.zip> [--backend local] [--sin-resumen]
+"""
+import asyncio
+import os
+import zipfile
+from typing import Optional
+from app import huggingface, pdf, resumidor
+
+EXPEDIENTE_MAX_PDF_MB = int(os.getenv("EXPEDIENTE_MAX_PDF_MB", "50"))
+
+
+def _miembros_pdf(archivo: zipfile.ZipFile) -> list[zipfile.ZipInfo]:
+    return [
+        info for info in archivo.infolist()
+        if not info.is_dir()
+        and info.filename.lower().endswith(".pdf")
+        and not os.path.basename(info.filename).startswith(".")
+        and not info.filename.startswith("__MACOSX/")
+    ]
+
+
+async def extraer_textos(ruta_zip: str) -> list[dict]:
+    """[{nombre_archivo, texto}] o [{nombre_archivo, error}] por cada PDF del ZIP, en orden."""
+    limite = asyncio.Semaphore(2 * pdf.PDF_WORKERS)
+    with zipfile.ZipFile(ruta_zip) as archivo:
+        miembros = _miembros_pdf(archivo)
+
+        async def extraer(info: zipfile.ZipInfo) -> dict:
+            if info.file_size > EXPEDIENTE_MAX_PDF_MB * 1024 * 1024:
+                return {"nombre_archivo": info.filename, "error": f"Supera {EXPEDIENTE_MAX_PDF_MB} MB"}
+            async with limite:
+                try:
+                    contenido = await asyncio.to_thread(archivo.read, info)
+                    texto = await pdf.extraer_texto_async(contenido)
+                except Exception as e:
+                    return {"nombre_archivo": info.filename, "error": f"No se pudo leer el PDF: {e}"}
+            return {"nombre_archivo": info.filename, "texto": texto}
+
+        return await asyncio.gather(*(extraer(info) for info in miembros))
+
+
+async def procesar_zip(
+    ruta_zip: str,
+    remoto: Optional[resumidor.Resumidor] = None,
+    backend: Optional[str] = None,
+) -> tuple[list[dict], list[str]]:
+    """
+    Extrae los PDFs del ZIP y, si se entrega un resumidor remoto, los resume
+    (``backend`` elige entre él y el local, ver resumidor.elegir). Devuelve los
+    documentos listos para crud.crear_documentos y los errores por archivo.
+    """
+    extraidos = await extraer_textos(ruta_zip)
+    errores = [f"{d['nombre_archivo']}: {d['error']}" for d in extraidos if "error" in d]
+    documentos = [{**d, "resumen": None} for d in extraidos if "error" not in d]
+
+    if remoto is not None and documentos:
+        elegido = resumidor.elegir(backend, remoto)
+
+        async def resumir_uno(documento: dict):
+            try:
+                documento["resumen"] = await resumidor.resumir_con_cache(elegido, documento["texto"])
+            except huggingface.ErrorInferencia as e:
+                errores.append(f"{documento['nombre_archivo']}: no se pudo resumir ({e.detalle})")
+
+        await resumidor.procesar_en_lote(documentos, resumir_uno)
+    return documentos, errores
+
+
+if __name__ == "__main__":
+    import argparse
+    from app import crud, migraciones
+    from app.db import Base, SessionLocal, engine
+
+    parser = argparse.ArgumentParser(description="Ingesta un expediente ZIP de PDFs en una causa")
+    parser.add_argument("causa_id", type=int)
+    parser.add_argument("zip")
+    parser.add_argument("--backend", choices=resumidor.BACKENDS)
+    parser.add_argument("--sin-resumen", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    migraciones.aplicar(engine)
+    documentos, errores = asyncio.run(procesar_zip(args.zip, None if args.sin_resumen else resumidor.resumidor_pdf, args.backend))
+    db = SessionLocal()
+    try:
+        if crud.obtener_causa(db, args.causa_id) is None:
+            raise SystemExit(f"No existe la causa {args.causa_id}")
+        crud.crear_documentos(db, args.causa_id, documentos)
+    finally:
+        db.close()
+        pdf.cerrar()
+    print(f"Documentos guardados: {len(documentos)}")
+    for error in errores:
+        print(f"  {error}")
@@ -0,0 +1,97 @@
+"""
+Exportación en streaming de causas con su checklist (NDJSON o CSV).
+
+Las filas se leen con un cursor por lotes (yield_per) ordenado por causa, y
+se emiten a medida que se leen: la memoria no depende del tamaño de la tabla.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+from app import models
+
+LOTE_LECTURA = 1000
+
+COLUMNAS_CSV = [
+    "causa_id", "rit", "representado", "tribunal", "abogado_responsable", "fecha_ingreso",
+    "tarea_id", "tarea_nombre", "completada", "comentarios", "fecha_completada",
+]
+
+
+def _filas(db: Session):
+    consulta = (
+        select(
+            models.Causa.id.label("causa_id"),
+            models.Causa.rit,
+            models.Causa.representado,
+            models.Causa.tribunal,
+            models.Causa.abogado_responsable,
+            models.Causa.fecha_ingreso,
+            models.ChecklistTarea.id.label("tarea_id"),
+            models.ChecklistTarea.tarea_nombre,
+            models.ChecklistTarea.completada,
+            models.ChecklistTarea.comentarios,
+            models.ChecklistTarea.fecha_completada,
+        )
+        .outerjoin(models.ChecklistTarea, models.ChecklistTarea.causa_id == models.Causa.id)
+        .order_by(models.Causa.id, models.ChecklistTarea.id)
+        .execution_options(yield_per=LOTE_LECTURA)
+    )
+    return db.execute(consulta)
+
+
+def _iso(valor):
+    return valor.isoformat() if isinstance(valor, date) else valor
+
+
+def generar_ndjson(fabrica_sesion: sessionmaker) -> Iterator[str]:
+    """Una línea JSON por causa, con su checklist anidado."""
+    db = fabrica_sesion()
+    try:
+        actual = None
+        for fila in _filas(db):
+            if actual is None or actual["id"] != fila.causa_id:
+                if actual is not None:
+                    yield json.dumps(actual, ensure_ascii=False) + "\n"
+                actual = {
+                    "id": fila.causa_id,
+                    "rit": fila.rit,
+                    "representado": fila.representado,
+                    "tribunal": fila.tribunal,
+                    "abogado_responsable": fila.abogado_responsable,
+                    "fecha_ingreso": _iso(fila.fecha_ingreso),
+                    "checklist": [],
+                }
+            if fila.tarea_id is not None:
+                actual["checklist"].append({
+                    "id": fila.tarea_id,
+                    "tarea_nombre": fila.tarea_nombre,
+                    "completada": bool(fila.completada),
+                    "comentarios": fila.comentarios,
+                    "fecha_completada": _iso(fila.fecha_completada),
+                })
+        if actual is not None:
+            yield json.dumps(actual, ensure_ascii=False) + "\n"
+    finally:
+        db.close()
+
+
+def generar_csv(fabrica_sesion: sessionmaker) -> Iterator[str]:
+    """Una fila CSV por tarea; las causas sin tareas salen con columnas de tarea vacías."""
+    db = fabrica_sesion()
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    try:
+        escritor.writerow(COLUMNAS_CSV)
+        for i, fila in enumerate(_filas(db), start=1):
+            escritor.writerow([_iso(getattr(fila, col)) for col in COLUMNAS_CSV])
+            if i % LOTE_LECTURA == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    finally:
+        db.close()
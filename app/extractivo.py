@@ -0,0 +1,92 @@
+"""
+Resumen extractivo local (sin red): TF-IDF + TextRank sobre arrays de NumPy.
+
+Se puntúa cada oración por su centralidad en el grafo de similitud coseno
+entre oraciones y se devuelven las mejor puntuadas en su orden original.
+Para textos con muchas oraciones se usa la similitud con el centroide del
+documento, que es lineal en vez de cuadrática.
+"""
+import re
+import unicodedata
+import numpy as np
+
+MAX_ORACIONES_TEXTRANK = 800
+MAX_TERMINOS = 2000
+AMORTIGUACION = 0.85
+ITERACIONES = 50
+
+_ORACIONES = re.compile(r"(?<=[.!?;])\s+|\n{2,}")
+_PALABRAS = re.compile(r"[^\W\d_]{3,}")
+
+def _sin_tildes(texto: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", texto) if not unicodedata.combining(c))
+
+
+# Sin tildes, igual que los tokens: "según", "más" o "está" se comparan como "segun", "mas", "esta"
+STOPWORDS = frozenset(_sin_tildes("""
+a al ante bajo cabe con contra de del desde durante en entre hacia hasta mediante para por segun sin so
+sobre tras el la los las lo un una unos unas y e ni o u pero sino que como cuando donde quien cual cuyo
+este esta estos estas ese esa esos esas aquel aquella su sus se le les me te nos os mi tu ya no si mas
+muy tambien es son fue fueron ser sido ha han haber habia hay esta estan estaba
+""").split())
+
+
+def dividir_oraciones(texto: str) -> list[str]:
+    return [o.strip() for o in _ORACIONES.split(texto) if o and len(o.strip()) > 1]
+
+
+def terminos(oracion: str) -> list[str]:
+    """Términos de la oración para TF-IDF: en minúsculas, sin tildes y sin stopwords."""
+    return [p for p in _PALABRAS.findall(_sin_tildes(oracion.lower())) if p not in STOPWORDS]
+
+
+def _matriz_tfidf(oraciones: list[str]) -> np.ndarray:
+    tokens = [terminos(o) for o in oraciones]
+    frecuencias: dict[str, int] = {}
+    for palabras in tokens:
+        for palabra in set(palabras):
+            frecuencias[palabra] = frecuencias.get(palabra, 0) + 1
+    vocabulario = sorted(frecuencias, key=frecuencias.get, reverse=True)[:MAX_TERMINOS]
+    indice = {palabra: i for i, palabra in enumerate(vocabulario)}
+
+    tf = np.zeros((len(oraciones), len(vocabulario)), dtype=np.float32)
+    for fila, palabras in enumerate(tokens):
+        for palabra in palabras:
+            columna = indice.get(palabra)
+            if columna is not None:
+                tf[fila, columna] += 1
+    df = np.array([frecuencias[p] for p in vocabulario], dtype=np.float32)
+    idf = np.log((1 + len(oraciones)) / (1 + df)) + 1
+    tfidf = tf * idf
+    normas = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    return tfidf / np.where(normas == 0, 1, normas)
+
+
+def _textrank(matriz: np.ndarray) -> np.ndarray:
+    similitud = matriz @ matriz.T
+    np.fill_diagonal(similitud, 0)
+    sumas = similitud.sum(axis=1, keepdims=True)
+    transicion = similitud / np.where(sumas == 0, 1, sumas)
+    n = len(matriz)
+    puntajes = np.full(n, 1 / n, dtype=np.float32)
+    for _ in range(ITERACIONES):
+        nuevos = (1 - AMORTIGUACION) / n + AMORTIGUACION * (transicion.T @ puntajes)
+        if np.abs(nuevos - puntajes).sum() < 1e-6:
+            return nuevos
+        puntajes = nuevos
+    return puntajes
+
+
+def resumir(texto: str, oraciones: int = 3) -> str:
+    """Las `oraciones` más representativas del texto, en su orden original."""
+    candidatas = dividir_oraciones(texto)
+    if len(candidatas) <= oraciones:
+        return " ".join(candidatas)
+    matriz = _matriz_tfidf(candidatas)
+    if len(candidatas) <= MAX_ORACIONES_TEXTRANK:
+        puntajes = _textrank(matriz)
+    else:
+        centroide = matriz.mean(axis=0)
+        puntajes = matriz @ (centroide / (np.linalg.norm(centroide) or 1))
+    elegidas = np.sort(np.argsort(-puntajes, kind="stable")[:oraciones])
+    return " ".join(candidatas[i] for i in elegidas)
@@ -0,0 +1,210 @@
+"""
+Cliente HTTP async compartido para la API de inferencia de Hugging Face.
+
+- Un único httpx.AsyncClient por event loop reutiliza conexiones keep-alive
+  (sin un handshake TLS por llamada) y aplica timeouts a todas las peticiones.
+- Las respuestas 503 (modelo cargando) y 429, y los errores de conexión, se
+  reintentan hasta HF_REINTENTOS veces con backoff exponencial y jitter,
+  respetando Retry-After / estimated_time cuando el servidor los informa.
+- Un circuit breaker corta las llamadas durante HF_CIRCUITO_ESPERA segundos
+  tras HF_CIRCUITO_FALLOS fallos consecutivos, y luego deja pasar una prueba.
+- Un límite global de llamadas simultáneas (HF_MAX_CONCURRENCIA); si no hay
+  cupo en HF_ESPERA_COLA segundos la llamada falla en vez de acumularse.
+"""
+import asyncio
+import os
+import random
+import time
+import httpx
+
+HUGGINGFACE_API_TOKEN = os.getenv("HUGGINGFACE_API_TOKEN")
+API_BASE = os.getenv("HUGGINGFACE_API_BASE", "https://api-inference.huggingface.co/models")
+
+HF_TIMEOUT_CONEXION = float(os.getenv("HF_TIMEOUT_CONEXION", "5"))
+HF_TIMEOUT_LECTURA = float(os.getenv("HF_TIMEOUT_LECTURA", "60"))
+HF_MAX_CONEXIONES = int(os.getenv("HF_MAX_CONEXIONES", "20"))
+HF_MAX_CONCURRENCIA = int(os.getenv("HF_MAX_CONCURRENCIA", "8"))
+HF_ESPERA_COLA = float(os.getenv("HF_ESPERA_COLA", "10"))
+HF_REINTENTOS = int(os.getenv("HF_REINTENTOS", "3"))
+HF_BACKOFF_BASE = float(os.getenv("HF_BACKOFF_BASE", "0.5"))
+HF_BACKOFF_MAX = float(os.getenv("HF_BACKOFF_MAX", "20"))
+HF_CIRCUITO_FALLOS = int(os.getenv("HF_CIRCUITO_FALLOS", "5"))
+HF_CIRCUITO_ESPERA = float(os.getenv("HF_CIRCUITO_ESPERA", "30"))
+
+ESTADOS_REINTENTABLES = {429, 503}
+ERRORES_REINTENTABLES = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+class ErrorInferencia(Exception):
+    """La inferencia falló; `detalle` es lo que se informa al cliente."""
+
+    def __init__(self, detalle, status_code: int | None = None):
+        super().__init__(str(detalle))
+        self.detalle = detalle
+        self.status_code = status_code
+
+
+class Circuito:
+    """Circuit breaker por fallos consecutivos: cerrado -> abierto -> semiabierto (una prueba)."""
+
+    def __init__(self, umbral: int, espera: float):
+        self.umbral = umbral
+        self.espera = espera
+        self.fallos = 0
+        self.abierto_desde: float | None = None
+        self.prueba_en_curso = False
+
+    @property
+    def estado(self) -> str:
+        if self.abierto_desde is None:
+            return "cerrado"
+        if time.monotonic() - self.abierto_desde >= self.espera:
+            return "semiabierto"
+        return "abierto"
+
+    def permitir(self) -> bool:
+        estado = self.estado
+        if estado == "cerrado":
+            return True
+        if estado == "semiabierto" and not self.prueba_en_curso:
+            self.prueba_en_curso = True
+            return True
+        return False
+
+    def registrar_exito(self):
+        self.fallos = 0
+        self.abierto_desde = None
+        self.prueba_en_curso = False
+
+    def registrar_fallo(self):
+        self.fallos += 1
+        self.prueba_en_curso = False
+        if self.fallos >= self.umbral or self.abierto_desde is not None:
+            self.abierto_desde = time.monotonic()
+
+
+circuito = Circuito(HF_CIRCUITO_FALLOS, HF_CIRCUITO_ESPERA)
+
+# Cliente y semáforo por event loop (no se pueden compartir entre loops)
+_recursos: dict[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, asyncio.Semaphore]] = {}
+
+
+def url_modelo(modelo: str) -> str:
+    return f"{API_BASE}/{modelo}"
+
+
+def _recursos_del_loop() -> tuple[httpx.AsyncClient, asyncio.Semaphore]:
+    loop = asyncio.get_running_loop()
+    recursos = _recursos.get(loop)
+    if recursos is None or recursos[0].is_closed:
+        cliente = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {HUGGINGFACE_API_TOKEN}"},
+            timeout=httpx.Timeout(HF_TIMEOUT_LECTURA, connect=HF_TIMEOUT_CONEXION),
+            limits=httpx.Limits(max_connections=HF_MAX_CONEXIONES, max_keepalive_connections=HF_MAX_CONEXIONES),
+        )
+        for otro_loop in [l for l in _recursos if l.is_closed()]:
+            del _recursos[otro_loop]
+        recursos = _recursos[loop] = (cliente, asyncio.Semaphore(HF_MAX_CONCURRENCIA))
+    return recursos
+
+
+def obtener_cliente() -> httpx.AsyncClient:
+    """Cliente del event loop actual."""
+    return _recursos_del_loop()[0]
+
+
+def _espera(intento: int, response: httpx.Response | None) -> float:
+    """Backoff exponencial con jitter; usa Retry-After o estimated_time si vienen en la respuesta."""
+    sugerida = None
+    if response is not None:
+        try:
+            sugerida = float(response.headers["Retry-After"])
+        except (KeyError, ValueError):
+            try:
+                sugerida = float(response.json().get("estimated_time"))
+            except (ValueError, TypeError, AttributeError):
+                pass
+    calculada = HF_BACKOFF_BASE * (2 ** intento) * (1 + random.random())
+    return min(HF_BACKOFF_MAX, sugerida if sugerida is not None else calculada)
+
+
+async def inferir(modelo: str, payload: dict) -> httpx.Response:
+    """
+    POST al modelo indicado con reintentos, circuit breaker y límite de
+    concurrencia. Lanza ErrorInferencia si el circuito está abierto o no hay
+    cupo, y httpx.HTTPError si la conexión falla o vence el timeout.
+    """
+    if circuito.estado == "abierto":
+        raise ErrorInferencia("El servicio de resúmenes no está disponible, intenta más tarde", 503)
+
+    cliente, semaforo = _recursos_del_loop()
+    try:
+        await asyncio.wait_for(semaforo.acquire(), HF_ESPERA_COLA)
+    except asyncio.TimeoutError:
+        raise ErrorInferencia("Hay demasiados resúmenes en curso, intenta más tarde", 503)
+
+    try:
+        if not circuito.permitir():
+            raise ErrorInferencia("El servicio de resúmenes no está disponible, intenta más tarde", 503)
+        for intento in range(HF_REINTENTOS + 1):
+            try:
+                response = await cliente.post(url_modelo(modelo), json=payload)
+            except ERRORES_REINTENTABLES:
+                if intento == HF_REINTENTOS:
+                    circuito.registrar_fallo()
+                    raise
+                await asyncio.sleep(_espera(intento, None))
+                continue
+            except httpx.HTTPError:
+                circuito.registrar_fallo()
+                raise
+            if response.status_code in ESTADOS_REINTENTABLES and intento < HF_REINTENTOS:
+                await asyncio.sleep(_espera(intento, response))
+                continue
+            break
+    except asyncio.CancelledError:
+        circuito.prueba_en_curso = False
+        raise
+    finally:
+        semaforo.release()
+
+    if response.status_code >= 500 or response.status_code == 429:
+        circuito.registrar_fallo()
+    else:
+        circuito.registrar_exito()
+    return response
+
+
+async def generar_texto(modelo: str, prompt: str) -> str:
+    """
+    Texto generado por el modelo (generated_text o summary_text según el
+    pipeline). Lanza ErrorInferencia ante timeout, error de red, circuito
+    abierto o respuesta no 200.
+    """
+    try:
+        response = await inferir(modelo, {"inputs": prompt})
+    except httpx.TimeoutException:
+        raise ErrorInferencia("Tiempo de espera agotado", 504)
+    except httpx.HTTPError as e:
+        raise ErrorInferencia(str(e), 502)
+
+    if response.status_code != 200:
+        try:
+            detalle = response.json()
+        except ValueError:
+            detalle = response.text
+        raise ErrorInferencia(detalle, response.status_code)
+
+    resultado = response.json()
+    if isinstance(resultado, list) and resultado and isinstance(resultado[0], dict):
+        for clave in ("generated_text", "summary_text"):
+            if clave in resultado[0]:
+                return resultado[0][clave]
+    raise ErrorInferencia(resultado, 502)
+
+
+async def cerrar():
+    loop = asyncio.get_running_loop()
+    recursos = _recursos.pop(loop, None)
+    if recursos is not None:
+        await recursos[0].aclose()
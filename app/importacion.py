@@ -0,0 +1,145 @@
+"""
+Validación vectorizada de planillas de causas (pandas).
+
+`validar_planilla` devuelve los registros listos para insertar en bloque
+(crud.crear_causas_bulk) y los errores por fila, con el número de fila de
+Excel (encabezado = fila 1).
+
+Para planillas grandes, `bloques_xlsx` lee el archivo desde disco con
+openpyxl en modo read-only y entrega bloques de tamaño fijo, de modo que la
+memoria no depende del tamaño de la planilla; `importar_bloques` valida e
+inserta cada bloque en su propia transacción.
+"""
+from typing import Callable, Iterable, Optional
+import pandas as pd
+from openpyxl import load_workbook
+from sqlalchemy.orm import Session
+from app import crud
+
+# Columna de la planilla -> campo de models.Causa
+COLUMNAS = {
+    "RIT": "rit",
+    "Representado": "representado",
+    "Tribunal": "tribunal",
+    "Abogado responsable": "abogado_responsable",
+    "Fecha ingreso": "fecha_ingreso",
+}
+
+
+def faltan_columnas(columnas) -> list[str]:
+    return [col for col in COLUMNAS if col not in columnas]
+
+
+def validar_planilla(df: pd.DataFrame, fila_inicial: int = 2) -> tuple[list[dict], list[str]]:
+    """
+    Valida todas las filas de una vez. `fila_inicial` es el número de fila de
+    Excel correspondiente a la primera fila de `df` (útil al procesar por bloques).
+    Cada registro incluye su número de fila en la clave "fila".
+    """
+    df = df.reset_index(drop=True)
+    numeros_fila = df.index + fila_inicial
+    datos = pd.DataFrame(index=df.index)
+    errores_por_fila: dict[int, list[str]] = {}
+
+    for columna, campo in COLUMNAS.items():
+        if campo == "fecha_ingreso":
+            continue
+        texto = df[columna].astype("string").str.strip()
+        vacios = texto.isna() | (texto == "")
+        for n in numeros_fila[vacios.to_numpy()]:
+            errores_por_fila.setdefault(n, []).append(f"falta {columna}")
+        datos[campo] = texto
+
+    fechas = pd.to_datetime(df["Fecha ingreso"], errors="coerce")
+    for n in numeros_fila[fechas.isna().to_numpy()]:
+        errores_por_fila.setdefault(n, []).append("Fecha ingreso inválida")
+    datos["fecha_ingreso"] = fechas.dt.date
+
+    # La clave (rit, tribunal) es única: sólo vale la primera aparición en la planilla
+    sin_errores = ~numeros_fila.isin(list(errores_por_fila))
+    repetidas = datos[sin_errores].duplicated(["rit", "tribunal"], keep="first")
+    for n in numeros_fila[sin_errores][repetidas.to_numpy()]:
+        errores_por_fila.setdefault(n, []).append("RIT repetido en la planilla para el mismo tribunal")
+
+    validas = ~numeros_fila.isin(list(errores_por_fila))
+    datos["fila"] = numeros_fila
+    registros = datos[validas].to_dict("records")
+    errores = [f"Fila {n}: {', '.join(msgs)}" for n, msgs in sorted(errores_por_fila.items())]
+    return registros, errores
+
+
+def bloques_xlsx(ruta: str, tamano: int):
+    """
+    Itera la primera hoja de un .xlsx en bloques de `tamano` filas sin cargarla
+    completa: (bloque, fila_inicial). Las filas completamente vacías se omiten.
+    """
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezado = next(filas, None) or ()
+        columnas = [str(c).strip() if c is not None else "" for c in encabezado]
+        faltantes = faltan_columnas(columnas)
+        if faltantes:
+            raise ValueError(f"Faltan columnas requeridas en la planilla: {', '.join(faltantes)}")
+
+        bloque: list[tuple] = []
+        fila_inicial = 2
+        for numero, fila in enumerate(filas, start=2):
+            if all(valor is None for valor in fila):
+                continue
+            if not bloque:
+                fila_inicial = numero
+            bloque.append(fila)
+            if len(bloque) == tamano:
+                yield pd.DataFrame(bloque, columns=columnas), fila_inicial
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas), fila_inicial
+    finally:
+        libro.close()
+
+
+def guardar_registros(db: Session, registros: list[dict], modo: str = "crear") -> tuple[int, int, list[str]]:
+    """
+    Persiste registros validados. En modo "crear" las causas que ya existen
+    (mismo RIT y tribunal) se informan como error; en modo "upsert" se
+    actualizan si cambiaron. Devuelve (creadas, actualizadas, errores).
+    """
+    filas = [registro.pop("fila") for registro in registros]
+    if modo == "upsert":
+        creadas, actualizadas = crud.upsert_causas_bulk(db, registros)
+        return len(creadas), len(actualizadas), []
+
+    existentes = crud.causas_existentes(db, [(r["rit"], r["tribunal"]) for r in registros])
+    nuevos, errores = [], []
+    for fila, registro in zip(filas, registros):
+        if (registro["rit"], registro["tribunal"]) in existentes:
+            errores.append(f"Fila {fila}: la causa {registro['rit']} ya existe en {registro['tribunal']}")
+        else:
+            nuevos.append(registro)
+    return len(crud.crear_causas_bulk(db, nuevos)), 0, errores
+
+
+def importar_bloques(
+    db: Session,
+    bloques: Iterable[tuple[pd.DataFrame, int]],
+    modo: str = "crear",
+    al_avanzar: Optional[Callable[[int, list[str], int, int], None]] = None,
+) -> tuple[int, int, list[str]]:
+    """
+    Valida e inserta cada bloque (un commit por bloque). `al_avanzar` recibe
+    (filas del bloque, errores del bloque, creadas, actualizadas) tras cada
+    commit. Devuelve (creadas, actualizadas, errores).
+    """
+    creadas = actualizadas = 0
+    errores: list[str] = []
+    for bloque, fila_inicial in bloques:
+        registros, errores_bloque = validar_planilla(bloque, fila_inicial)
+        creadas_bloque, actualizadas_bloque, errores_guardado = guardar_registros(db, registros, modo)
+        errores_bloque = errores_bloque + errores_guardado
+        creadas += creadas_bloque
+        actualizadas += actualizadas_bloque
+        errores.extend(errores_bloque)
+        if al_avanzar:
+            al_avanzar(len(bloque), errores_bloque, creadas_bloque, actualizadas_bloque)
+    return creadas, actualizadas, errores
@@ -1,10 +1,11 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from dotenv import load_dotenv
 
-from app.db import Base, engine
-from app import models
+from app.db import Base, SessionLocal, engine
+from app import auth, models, migraciones, huggingface, pdf, cache_resumen, trabajos
 from app.auth import crear_token_de_acceso
 from app.api import endpoints, usuarios, metricas
 from app.api.resumen import router as resumen_router  # <- tu nuevo router de resumen PDF
@@ -14,16 +15,34 @@ import os
 load_dotenv()
 print("TOKEN CARGADO:", os.getenv("HUGGINGFACE_API_TOKEN"))
 
-# Crear las tablas automáticamente
+# Crear las tablas automáticamente y aplicar migraciones pendientes
 Base.metadata.create_all(bind=engine)
+migraciones.aplicar(engine)
+
+# Importaciones que quedaron activas tras una caída o reinicio: no deben ocupar la cola
+with SessionLocal() as _db:
+    trabajos.vencer_trabajos(_db)
 
 # Inicializar FastAPI
 app = FastAPI()
 
+@app.exception_handler(auth.HashSaturado)
+def hashing_saturado(request: Request, exc: auth.HashSaturado):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Demasiadas autenticaciones en curso, intenta más tarde"},
+        headers={"Retry-After": "1"},
+    )
+
 @app.get("/")
 def root():
     return {"mensaje": "¡Iuri MVP procesal listo y modularizado!"}
 
+# Liberar el cliente HTTP compartido, el pool de extracción de PDFs y la caché en disco
+app.add_event_handler("shutdown", huggingface.cerrar)
+app.add_event_handler("shutdown", pdf.cerrar)
+app.add_event_handler("shutdown", cache_resumen.cache.cerrar)
+
 # Routers
 app.include_router(endpoints.router)
 app.include_router(usuarios.router)
@@ -0,0 +1,167 @@
+"""
+Migraciones versionadas del esquema.
+
+`Base.metadata.create_all` crea las tablas nuevas pero nunca altera las
+existentes; las migraciones cubren ese hueco (índices, columnas nuevas) sobre
+una base como iuri.db sin reconstruirla. Se aplican después de create_all,
+así que sólo tratan tablas que ya existían. Cada migración se aplica una sola
+vez y queda registrada en la tabla schema_version. Se ejecutan al iniciar la
+app o manualmente:
+
+    python -m app.migraciones
+
+Una migración que todavía no puede aplicarse (p.ej. el índice único de la 2
+sobre causas duplicadas) se informa en el log y se reintenta en el próximo
+arranque, sin impedir que la app inicie. Las causas duplicadas se fusionan con:
+
+    python -m app.migraciones --fusionar-duplicadas
+
+Para agregar una migración, definir una función que recibe la conexión y
+sumarla al final de MIGRACIONES con el siguiente número de versión.
+"""
+from datetime import datetime
+import logging
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, delete, func, select, text, update
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from app import busqueda, models
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("descripcion", String, nullable=False),
+    Column("fecha_aplicada", DateTime, nullable=False),
+)
+
+
+def _crear_indices(conn: Connection, tabla, nombres: list[str]):
+    indices = {indice.name: indice for indice in tabla.__table__.indexes}
+    for nombre in nombres:
+        indices[nombre].create(conn, checkfirst=True)
+
+
+def _m001_indices_consultas(conn: Connection):
+    _crear_indices(conn, models.Causa, ["ix_causas_abogado_id", "ix_causas_tribunal_id"])
+    _crear_indices(conn, models.ChecklistTarea, [
+        "ix_checklist_causa_completada",
+        "ix_checklist_completada_fecha",
+        "ix_checklist_causa_nombre",
+    ])
+
+
+class MigracionPendiente(Exception):
+    """La migración no puede aplicarse todavía; se omite y se reintenta en el próximo arranque."""
+
+
+def _m002_unicidad_rit_tribunal(conn: Connection):
+    duplicadas = conn.execute(text(
+        "SELECT rit, tribunal, COUNT(*) FROM causas GROUP BY rit, tribunal HAVING COUNT(*) > 1 LIMIT 10"
+    )).all()
+    if duplicadas:
+        ejemplos = ", ".join(f"{rit} ({tribunal}) x{n}" for rit, tribunal, n in duplicadas)
+        raise MigracionPendiente(
+            f"Hay causas duplicadas por RIT y tribunal ({ejemplos}); el índice único no se crea "
+            "hasta fusionarlas con: python -m app.migraciones --fusionar-duplicadas"
+        )
+    _crear_indices(conn, models.Causa, ["ux_causas_rit_tribunal"])
+
+
+def fusionar_duplicadas(engine: Engine) -> int:
+    """
+    Fusiona las causas repetidas por (rit, tribunal) en la de menor id, en una
+    sola transacción, para poder aplicar la migración 2:
+
+    - las tareas de las duplicadas pasan a la causa conservada, salvo las que
+      ya existen en ella con el mismo nombre, que se descartan;
+    - los documentos pasan a la causa conservada;
+    - se eliminan las duplicadas y se recalcula el rollup de cumplimiento.
+
+    Devuelve el número de causas eliminadas.
+    """
+    from sqlalchemy.orm import Session
+    from app import cumplimiento
+
+    Causa, Tarea = models.Causa, models.ChecklistTarea
+    with Session(engine) as db:
+        grupos = db.execute(
+            select(Causa.rit, Causa.tribunal, func.min(Causa.id))
+            .group_by(Causa.rit, Causa.tribunal)
+            .having(func.count() > 1)
+        ).all()
+        eliminadas = 0
+        for rit, tribunal, conservada in grupos:
+            duplicadas = db.scalars(
+                select(Causa.id).where(Causa.rit == rit, Causa.tribunal == tribunal, Causa.id != conservada)
+            ).all()
+            nombres = set(db.scalars(select(Tarea.tarea_nombre).where(Tarea.causa_id == conservada)))
+            for tarea in db.scalars(select(Tarea).where(Tarea.causa_id.in_(duplicadas)).order_by(Tarea.id)):
+                if tarea.tarea_nombre in nombres:
+                    db.delete(tarea)
+                else:
+                    tarea.causa_id = conservada
+                    nombres.add(tarea.tarea_nombre)
+            db.execute(
+                update(models.Documento).where(models.Documento.causa_id.in_(duplicadas)).values(causa_id=conservada)
+            )
+            db.execute(delete(models.CumplimientoSemanal).where(models.CumplimientoSemanal.causa_id.in_(duplicadas)))
+            db.flush()
+            db.execute(delete(Causa).where(Causa.id.in_(duplicadas)))
+            cumplimiento.refrescar(db, [conservada])
+            eliminadas += len(duplicadas)
+        db.commit()
+    return eliminadas
+
+
+def _m003_busqueda_fts(conn: Connection):
+    if conn.dialect.name == "sqlite":
+        busqueda.crear(conn)
+
+
+MIGRACIONES = [
+    (1, "Índices compuestos para filtros de causas, métricas y checklist", _m001_indices_consultas),
+    (2, "Índice único (rit, tribunal) en causas", _m002_unicidad_rit_tribunal),
+    (3, "Búsqueda de texto completo FTS5 sobre causas y documentos (SQLite)", _m003_busqueda_fts),
+]
+
+
+def aplicar(engine: Engine) -> list[int]:
+    """Aplica las migraciones pendientes, cada una en su transacción. Devuelve las versiones aplicadas."""
+    _metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        aplicadas = set(conn.scalars(select(schema_version.c.version)))
+
+    nuevas = []
+    for version, descripcion, migracion in MIGRACIONES:
+        if version in aplicadas:
+            continue
+        try:
+            with engine.begin() as conn:
+                migracion(conn)
+                conn.execute(schema_version.insert().values(
+                    version=version, descripcion=descripcion, fecha_aplicada=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Otro worker la registró en paralelo; las migraciones son idempotentes
+            continue
+        except MigracionPendiente as e:
+            # No impide arrancar: la app sigue funcionando sin esta migración
+            logger.warning("Migración %s omitida: %s", version, e)
+            continue
+        nuevas.append(version)
+    return nuevas
+
+
+if __name__ == "__main__":
+    import sys
+    from app.db import Base, engine
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    if "--fusionar-duplicadas" in sys.argv:
+        print(f"Causas duplicadas fusionadas: {fusionar_duplicadas(engine)}")
+    versiones = aplicar(engine)
+    print(f"Migraciones aplicadas: {versiones}" if versiones else "El esquema ya está al día")
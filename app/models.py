@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date
+from sqlalchemy import Column, Integer, String, Date, Index
 from app.db import Base
 
 class Causa(Base):
@@ -11,7 +11,15 @@ class Causa(Base):
     abogado_responsable = Column(String, nullable=False)
     fecha_ingreso = Column(Date, nullable=False)
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey
+    __table_args__ = (
+        # Una causa se identifica por su RIT dentro del tribunal; la importación usa esta clave para el upsert
+        Index("ux_causas_rit_tribunal", "rit", "tribunal", unique=True),
+        # Filtros de /causas y métricas, ordenados por id para la paginación keyset
+        Index("ix_causas_abogado_id", "abogado_responsable", "id"),
+        Index("ix_causas_tribunal_id", "tribunal", "id"),
+    )
+
+from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 # ya tenés la clase Causa
@@ -29,6 +37,13 @@ class ChecklistTarea(Base):
 
     causa = relationship("Causa", backref="checklist")
 
+    __table_args__ = (
+        # Cubren el rollup de cumplimiento, filtrar_tareas y actualizar_tarea_por_nombre
+        Index("ix_checklist_causa_completada", "causa_id", "completada", "fecha_completada"),
+        Index("ix_checklist_completada_fecha", "completada", "fecha_completada", "causa_id"),
+        Index("ix_checklist_causa_nombre", "causa_id", "tarea_nombre"),
+    )
+
 from sqlalchemy import Column, Integer, String, Boolean, DateTime
 from datetime import datetime
 from app.db import Base
@@ -42,4 +57,132 @@ class Usuario(Base):
     hashed_password = Column(String, nullable=False)
     rol = Column(String, nullable=False)            # abogado | supervisor | admin
     activo = Column(Boolean, default=True)
-    fecha_creacion = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+from sqlalchemy import UniqueConstraint
+
+class CumplimientoSemanal(Base):
+    """
+    Rollup de cumplimiento por (abogado, causa, semana ISO). La fila con
+    semana == "total" guarda el total de tareas de la causa; las filas
+    "AAAA-Www" guardan las tareas completadas en esa semana.
+    Se mantiene desde crud (ver app/cumplimiento.py).
+    """
+    __tablename__ = "cumplimiento_semanal"
+
+    id = Column(Integer, primary_key=True, index=True)
+    abogado_responsable = Column(String, nullable=False)
+    causa_id = Column(Integer, ForeignKey("causas.id"), nullable=False)
+    semana = Column(String, nullable=False)
+    total_tareas = Column(Integer, nullable=False, default=0)
+    completadas = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("causa_id", "semana", name="uq_cumplimiento_causa_semana"),
+        Index("ix_cumplimiento_abogado_semana", "abogado_responsable", "semana"),
+    )
+
+from sqlalchemy import Text
+
+class TrabajoImportacion(Base):
+    """Importación de planilla ejecutada en segundo plano (ver app/trabajos.py)."""
+    __tablename__ = "trabajos_importacion"
+
+    id = Column(String, primary_key=True)
+    nombre_archivo = Column(String, nullable=False)
+    estado = Column(String, nullable=False, default="pendiente")   # pendiente | en_proceso | completado | fallido
+    filas_procesadas = Column(Integer, nullable=False, default=0)
+    filas_fallidas = Column(Integer, nullable=False, default=0)
+    creadas = Column(Integer, nullable=False, default=0)
+    actualizadas = Column(Integer, nullable=False, default=0)
+    errores = Column(Text, nullable=True)                           # JSON: lista de mensajes
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+    fecha_inicio = Column(DateTime, nullable=True)
+    fecha_fin = Column(DateTime, nullable=True)
+
+import zlib
+from sqlalchemy import LargeBinary
+
+
+class ContenidoDocumento(Base):
+    """
+    Texto extraído de un documento, comprimido con zlib y direccionado por su
+    hash SHA-256: un mismo escrito adjunto a muchas causas se guarda una vez,
+    junto con su resumen.
+    """
+    __tablename__ = "contenidos_documento"
+
+    id = Column(Integer, primary_key=True, index=True)
+    hash = Column(String(64), nullable=False, unique=True)
+    texto_comprimido = Column(LargeBinary, nullable=False)
+    tamano = Column(Integer, nullable=False)
+    resumen = Column(Text, nullable=True)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+
+    @property
+    def texto(self) -> str:
+        return zlib.decompress(self.texto_comprimido).decode("utf-8")
+
+
+class Documento(Base):
+    """Documento de una causa (p.ej. un PDF del expediente); el texto y el resumen viven en ContenidoDocumento."""
+    __tablename__ = "documentos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    causa_id = Column(Integer, ForeignKey("causas.id"), nullable=False, index=True)
+    contenido_id = Column(Integer, ForeignKey("contenidos_documento.id"), nullable=False, index=True)
+    nombre_archivo = Column(String, nullable=False)
+    fecha_creacion = Column(DateTime, default=datetime.utcnow)
+
+    causa = relationship("Causa", backref="documentos")
+    contenido = relationship("ContenidoDocumento", lazy="joined")
+
+    @property
+    def hash(self) -> str:
+        return self.contenido.hash
+
+    @property
+    def texto(self) -> str:
+        return self.contenido.texto
+
+    @property
+    def resumen(self):
+        return self.contenido.resumen
+
+
+from sqlalchemy import func
+
+
+class PlantillaChecklist(Base):
+    """
+    Plantilla de checklist que se instancia al crear una causa. Se elige por
+    tribunal; la plantilla sin tribunal (si existe) aplica a los demás.
+    """
+    __tablename__ = "plantillas_checklist"
+
+    id = Column(Integer, primary_key=True, index=True)
+    nombre = Column(String, nullable=False)
+    tribunal = Column(String, nullable=True)
+    fecha_actualizacion = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # Una plantilla por tribunal y a lo sumo una general: un UNIQUE sobre la
+        # columna admitiría varias con tribunal NULL, así que se indexa coalesce
+        Index("ux_plantillas_checklist_tribunal", func.coalesce(tribunal, ""), unique=True),
+    )
+
+    tareas_plantilla = relationship(
+        "PlantillaTarea", order_by="PlantillaTarea.orden", cascade="all, delete-orphan", lazy="selectin"
+    )
+
+    @property
+    def tareas(self) -> list[str]:
+        return [tarea.tarea_nombre for tarea in self.tareas_plantilla]
+
+
+class PlantillaTarea(Base):
+    __tablename__ = "plantillas_tarea"
+
+    id = Column(Integer, primary_key=True, index=True)
+    plantilla_id = Column(Integer, ForeignKey("plantillas_checklist.id"), nullable=False, index=True)
+    orden = Column(Integer, nullable=False)
+    tarea_nombre = Column(String, nullable=False)
@@ -0,0 +1,44 @@
+"""
+Extracción de texto de PDFs fuera del event loop.
+
+PyPDF2 es Python puro y consume CPU con el GIL tomado, así que la extracción
+corre en un pool de procesos (PDF_WORKERS, por defecto un proceso por core).
+Este módulo no importa nada de la app para que los procesos hijos arranquen
+livianos.
+"""
+import asyncio
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "0")) or os.cpu_count() or 1
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def extraer_texto(contenido: bytes) -> str:
+    """Texto de todas las páginas del PDF, concatenado."""
+    lector = PdfReader(io.BytesIO(contenido))
+    return "".join(pagina.extract_text() or "" for pagina in lector.pages)
+
+
+def obtener_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: hacer fork de un servidor con hilos activos no es seguro
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+async def extraer_texto_async(contenido: bytes) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(obtener_executor(), extraer_texto, contenido)
+
+
+def cerrar():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
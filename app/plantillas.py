@@ -0,0 +1,64 @@
+"""
+Caché en memoria de las plantillas de checklist (models.PlantillaChecklist).
+
+Las plantillas cambian rara vez y se leen en cada alta de causa, así que se
+compilan todas juntas (una consulta) en un dict tribunal -> nombres de tareas.
+Crear una causa sólo paga el INSERT masivo de sus tareas. crud invalida la
+caché al modificar plantillas; entre workers, PLANTILLAS_CACHE_TTL acota el
+tiempo que un cambio tarda en verse.
+"""
+import os
+import threading
+import time
+from typing import Optional
+from sqlalchemy.orm import Session
+from app import models
+
+PLANTILLAS_CACHE_TTL = int(os.getenv("PLANTILLAS_CACHE_TTL", "300"))
+
+
+class CachePlantillas:
+    def __init__(self, ttl: int = PLANTILLAS_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._compiladas: Optional[dict[Optional[str], tuple[str, ...]]] = None
+        self._expira = 0.0
+        self._version = 0
+
+    @staticmethod
+    def _cargar(db: Session) -> dict[Optional[str], tuple[str, ...]]:
+        filas = (
+            db.query(models.PlantillaChecklist.tribunal, models.PlantillaTarea.tarea_nombre)
+            .join(models.PlantillaTarea, models.PlantillaTarea.plantilla_id == models.PlantillaChecklist.id)
+            .order_by(models.PlantillaChecklist.id, models.PlantillaTarea.orden)
+        )
+        compiladas: dict[Optional[str], list[str]] = {}
+        for tribunal, tarea_nombre in filas:
+            compiladas.setdefault(tribunal, []).append(tarea_nombre)
+        return {tribunal: tuple(tareas) for tribunal, tareas in compiladas.items()}
+
+    def compiladas(self, db: Session) -> dict[Optional[str], tuple[str, ...]]:
+        with self._lock:
+            if self._compiladas is not None and self._expira > time.monotonic():
+                return self._compiladas
+            version = self._version
+        compiladas = self._cargar(db)
+        with self._lock:
+            # Si se invalidó mientras se cargaba, se usa igual pero no se guarda
+            if version == self._version:
+                self._compiladas = compiladas
+                self._expira = time.monotonic() + self.ttl
+        return compiladas
+
+    def tareas_para(self, db: Session, tribunal: str) -> Optional[tuple[str, ...]]:
+        """Tareas de la plantilla del tribunal, o de la general; None si no hay ninguna."""
+        compiladas = self.compiladas(db)
+        return compiladas.get(tribunal) or compiladas.get(None)
+
+    def invalidar(self):
+        with self._lock:
+            self._version += 1
+            self._compiladas = None
+
+
+cache = CachePlantillas()
@@ -0,0 +1,220 @@
+"""
+Backends de resumen y resumen map-reduce para textos largos.
+
+Los endpoints resumen a través de la interfaz `Resumidor`; hay un backend
+remoto (Hugging Face) y uno local extractivo (app/extractivo.py), elegible
+por configuración (RESUMIDOR_BACKEND) o por petición.
+
+Resumen map-reduce:
+El texto se divide en ventanas del tamaño que acepta el modelo; las ventanas
+se resumen en paralelo (con un límite de concurrencia) y los resúmenes
+parciales se combinan en un paso de reducción, que se repite si el texto
+combinado todavía no cabe en una ventana. La latencia total es cercana a la
+de una llamada por nivel, en lugar de truncar el documento.
+"""
+import abc
+import asyncio
+import logging
+import os
+import re
+from typing import Any, Awaitable, Callable, Optional
+from app import cache_resumen, extractivo, huggingface
+
+logger = logging.getLogger(__name__)
+
+RESUMEN_VENTANA = int(os.getenv("RESUMEN_VENTANA", "3000"))        # caracteres por ventana
+RESUMEN_CONCURRENCIA = int(os.getenv("RESUMEN_CONCURRENCIA", "4"))  # llamadas simultáneas por documento
+RESUMEN_MAX_NIVELES = 3
+
+_FIN_DE_ORACION = re.compile(r"[.;:!?]\s")
+
+
+def dividir_en_ventanas(texto: str, tamano: int | None = None) -> list[str]:
+    """
+    Corta el texto en ventanas de hasta `tamano` caracteres, prefiriendo un fin
+    de oración y si no un espacio dentro de la segunda mitad de la ventana.
+    """
+    tamano = tamano or RESUMEN_VENTANA
+    texto = texto.strip()
+    ventanas = []
+    inicio = 0
+    while len(texto) - inicio > tamano:
+        fin = inicio + tamano
+        corte = -1
+        for coincidencia in _FIN_DE_ORACION.finditer(texto, inicio + tamano // 2, fin):
+            corte = coincidencia.start() + 1
+        if corte == -1:
+            corte = texto.rfind(" ", inicio + tamano // 2, fin)
+        if corte == -1:
+            corte = fin
+        ventanas.append(texto[inicio:corte].strip())
+        inicio = corte
+    if texto[inicio:].strip():
+        ventanas.append(texto[inicio:].strip())
+    return ventanas
+
+
+async def resumir_map_reduce(
+    texto: str,
+    resumir_ventana: Callable[[str], Awaitable[str]],
+    combinar: Callable[[str], Awaitable[str]],
+    tamano: int | None = None,
+    concurrencia: int | None = None,
+) -> str:
+    """
+    `resumir_ventana` resume un fragmento (paso map, o el texto completo si
+    cabe en una ventana); `combinar` resume la unión de resúmenes parciales
+    (paso reduce).
+    """
+    tamano = tamano or RESUMEN_VENTANA
+    ventanas = dividir_en_ventanas(texto, tamano)
+    if len(ventanas) <= 1:
+        return await resumir_ventana(ventanas[0] if ventanas else "")
+
+    limite = asyncio.Semaphore(concurrencia or RESUMEN_CONCURRENCIA)
+
+    async def _acotado(funcion, fragmento: str) -> str:
+        async with limite:
+            return await funcion(fragmento)
+
+    parciales = await asyncio.gather(*(_acotado(resumir_ventana, v) for v in ventanas))
+    for _ in range(RESUMEN_MAX_NIVELES):
+        combinado = "\n".join(p.strip() for p in parciales)
+        grupos = dividir_en_ventanas(combinado, tamano)
+        if len(grupos) <= 1:
+            break
+        parciales = await asyncio.gather(*(_acotado(combinar, g) for g in grupos))
+    else:
+        # Los resúmenes no convergen a una ventana: se reduce lo que cabe de la última ronda
+        combinado = "\n".join(p.strip() for p in parciales)[:tamano]
+    return await combinar(combinado)
+
+
+RESUMEN_LOTE_PARALELISMO = int(os.getenv("RESUMEN_LOTE_PARALELISMO", "8"))  # máximo por lote
+RESUMEN_LOTE_MAX = int(os.getenv("RESUMEN_LOTE_MAX", "100"))                 # elementos por lote
+
+
+def _error_inesperado(item, error: Exception) -> dict:
+    return {"error": "Error al generar resumen", "detalle": str(error)}
+
+
+async def procesar_en_lote(
+    items: list,
+    procesar: Callable[..., Awaitable],
+    paralelismo: int | None = None,
+    al_fallar: Callable[[Any, Exception], Any] = _error_inesperado,
+) -> list:
+    """
+    Ejecuta `procesar` sobre todos los elementos a la vez, con a lo sumo
+    `paralelismo` en curso (acotado por RESUMEN_LOTE_PARALELISMO). Devuelve
+    los resultados en el orden de `items`. `procesar` informa los errores
+    esperados en su resultado; cualquier otra excepción se registra y el
+    resultado de ese elemento es `al_fallar(item, error)`, sin abortar el lote.
+    """
+    limite = asyncio.Semaphore(min(paralelismo or RESUMEN_LOTE_PARALELISMO, RESUMEN_LOTE_PARALELISMO))
+
+    async def _acotado(item):
+        async with limite:
+            try:
+                return await procesar(item)
+            except Exception as e:
+                logger.exception("Falló un elemento del lote de resúmenes")
+                return al_fallar(item, e)
+
+    return await asyncio.gather(*(_acotado(item) for item in items))
+
+
+# ════════════════════════════════════════════════
+# Backends
+# ════════════════════════════════════════════════
+
+RESUMIDOR_BACKEND = os.getenv("RESUMIDOR_BACKEND", "huggingface")   # huggingface | local
+RESUMEN_LOCAL_ORACIONES = int(os.getenv("RESUMEN_LOCAL_ORACIONES", "3"))
+
+BACKENDS = ("huggingface", "local")
+
+
+class Resumidor(abc.ABC):
+    """Interfaz de un backend de resumen. `modelo` y `configuracion()` identifican el resultado en la caché."""
+    nombre = ""
+    modelo = ""
+    prompt = ""
+
+    @abc.abstractmethod
+    async def resumir(self, texto: str) -> str:
+        ...
+
+    def configuracion(self) -> str:
+        """Todo lo que, además del modelo, cambia el resumen de un mismo texto."""
+        return self.prompt
+
+
+class ResumidorHuggingFace(Resumidor):
+    """
+    Inferencia remota. Con prompts de fragmento y combinación, los textos que
+    no caben en una ventana se resumen con map-reduce; sin ellos el texto se
+    envía tal cual.
+    """
+    nombre = "huggingface"
+
+    def __init__(self, modelo: str, prompt: str = "{texto}", prompt_fragmento: str = None, prompt_combinar: str = None):
+        self.modelo = modelo
+        self.prompt = prompt
+        self.prompt_fragmento = prompt_fragmento
+        self.prompt_combinar = prompt_combinar
+
+    async def _generar(self, prompt: str, texto: str) -> str:
+        return await huggingface.generar_texto(self.modelo, prompt.format(texto=texto))
+
+    def configuracion(self) -> str:
+        if not self.prompt_fragmento:
+            return self.prompt
+        # Con map-reduce el resultado depende también de los prompts de cada paso y del corte en ventanas
+        return "\x00".join([self.prompt, self.prompt_fragmento, self.prompt_combinar or "", str(RESUMEN_VENTANA)])
+
+    async def resumir(self, texto: str) -> str:
+        if not self.prompt_fragmento or len(texto) <= RESUMEN_VENTANA:
+            return await self._generar(self.prompt, texto)
+        return await resumir_map_reduce(
+            texto,
+            lambda fragmento: self._generar(self.prompt_fragmento, fragmento),
+            lambda parciales: self._generar(self.prompt_combinar, parciales),
+        )
+
+
+class ResumidorExtractivo(Resumidor):
+    """Resumen extractivo local (TF-IDF + TextRank), sin red."""
+    nombre = "local"
+    modelo = "local/extractivo-textrank"
+
+    def __init__(self, oraciones: int = RESUMEN_LOCAL_ORACIONES):
+        self.oraciones = oraciones
+        self.prompt = f"oraciones={oraciones}"
+
+    async def resumir(self, texto: str) -> str:
+        # NumPy libera el GIL en las operaciones matriciales; fuera del event loop
+        return await asyncio.to_thread(extractivo.resumir, texto, self.oraciones)
+
+
+resumidor_local = ResumidorExtractivo()
+
+# Documentos (PDFs subidos, expedientes): compartido por los routers y el CLI de expedientes
+MODELO_PDF = "google/flan-t5-base"
+
+PROMPT_DOCUMENTO = "Resume el siguiente texto legal en 3 puntos clave:\n\n{texto}"
+PROMPT_FRAGMENTO = "Resume el siguiente fragmento de un texto legal:\n\n{texto}"
+PROMPT_COMBINAR = "Combina los siguientes resúmenes parciales de un texto legal en 3 puntos clave:\n\n{texto}"
+
+resumidor_pdf = ResumidorHuggingFace(MODELO_PDF, PROMPT_DOCUMENTO, PROMPT_FRAGMENTO, PROMPT_COMBINAR)
+
+
+def elegir(backend: Optional[str], remoto: Resumidor) -> Resumidor:
+    """El backend pedido, o el configurado en RESUMIDOR_BACKEND si no se indica."""
+    return resumidor_local if (backend or RESUMIDOR_BACKEND) == "local" else remoto
+
+
+async def resumir_con_cache(resumidor: Resumidor, texto: str) -> str:
+    """Un mismo texto (re-subido o repetido) se sirve desde la caché de resúmenes."""
+    return await cache_resumen.cache.obtener_o_calcular(
+        resumidor.modelo, resumidor.configuracion(), texto, lambda: resumidor.resumir(texto)
+    )
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, constr
+from pydantic import BaseModel, EmailStr, Field, constr, model_validator
 from typing import Optional
 from datetime import date, datetime
 
@@ -67,6 +67,22 @@ class ChecklistTareaUpdate(BaseModel):
     comentarios: Optional[str] = None
     fecha_completada: Optional[date] = None
 
+class ChecklistTareaLoteItem(ChecklistTareaUpdate):
+    """Una tarea del lote, identificada por `id` o por (`causa_id`, `tarea_nombre`)."""
+    id: Optional[int] = None
+    causa_id: Optional[int] = None
+    tarea_nombre: Optional[str] = None
+
+    @model_validator(mode="after")
+    def identificada(self):
+        por_nombre = self.causa_id is not None and self.tarea_nombre is not None
+        if (self.id is None) == (not por_nombre):
+            raise ValueError("Indique id o bien causa_id y tarea_nombre")
+        return self
+
+class ChecklistTareasLote(BaseModel):
+    tareas: list[ChecklistTareaLoteItem] = Field(..., min_length=1, max_length=500)
+
 class ChecklistTareaOut(ChecklistTareaBase):
     id: int
     causa_id: int
@@ -74,9 +90,65 @@ class ChecklistTareaOut(ChecklistTareaBase):
     model_config = {
         "from_attributes": True
     }
+
+# ════════════════════════════════════════════════
+# 📋 PLANTILLAS DE CHECKLIST
+# ════════════════════════════════════════════════
+
+class PlantillaChecklistCreate(BaseModel):
+    nombre: str
+    tribunal: Optional[str] = None  # None: plantilla general para los tribunales sin plantilla propia
+    tareas: list[str] = Field(..., min_length=1)
+
+class PlantillaChecklistOut(PlantillaChecklistCreate):
+    id: int
+    fecha_actualizacion: Optional[datetime] = None
+
+    model_config = {
+        "from_attributes": True
+    }
+
 class EmailRequest(BaseModel):
     email: EmailStr
 
 class PasswordResetConfirm(BaseModel):
     token: str
     new_password: constr(min_length=8)
+
+# ════════════════════════════════════════════════
+# 📥 IMPORTACIONES EN SEGUNDO PLANO
+# ════════════════════════════════════════════════
+
+class TrabajoImportacionOut(BaseModel):
+    id: str
+    nombre_archivo: str
+    estado: str
+    filas_procesadas: int
+    filas_fallidas: int
+    creadas: int
+    actualizadas: int
+    filas_por_segundo: float
+    errores: list[str] = []
+    fecha_creacion: datetime
+    fecha_inicio: Optional[datetime] = None
+    fecha_fin: Optional[datetime] = None
+
+# ════════════════════════════════════════════════
+# 📄 DOCUMENTOS
+# ════════════════════════════════════════════════
+
+class DocumentoOut(BaseModel):
+    id: int
+    causa_id: int
+    nombre_archivo: str
+    hash: str
+    resumen: Optional[str] = None
+    fecha_creacion: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class DocumentoTextoOut(DocumentoOut):
+    texto: str
@@ -0,0 +1,169 @@
+"""
+Importaciones de planillas en segundo plano.
+
+El upload se guarda en disco, se lee por bloques (importacion.bloques_xlsx)
+y se encola en un pool de hilos acotado
+(IMPORTACION_WORKERS, por defecto 2), separado del threadpool que atiende
+las peticiones. El progreso se guarda en la tabla trabajos_importacion, así
+cualquier worker de uvicorn puede responder la consulta de estado.
+
+Un trabajo que quedó pendiente o en proceso porque el proceso se cayó o se
+reinició no termina nunca; si lleva más de IMPORTACION_VENCIMIENTO segundos
+desde que empezó (o desde que se creó, si no llegó a empezar) se marca como
+fallido, al arrancar y antes de contar la cola. Se mide por antigüedad y no
+se vencen todos al arrancar porque otro worker puede estar ejecutándolos.
+"""
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session, sessionmaker
+from app import importacion, models
+
+logger = logging.getLogger(__name__)
+
+IMPORTACION_WORKERS = int(os.getenv("IMPORTACION_WORKERS", "2"))
+IMPORTACION_MAX_PENDIENTES = int(os.getenv("IMPORTACION_MAX_PENDIENTES", "20"))
+TAMANO_BLOQUE = int(os.getenv("IMPORTACION_TAMANO_BLOQUE", "1000"))
+IMPORTACION_VENCIMIENTO = int(os.getenv("IMPORTACION_VENCIMIENTO", "3600"))  # segundos
+MAX_ERRORES_GUARDADOS = 1000
+ACTIVOS = ("pendiente", "en_proceso")
+
+_executor = ThreadPoolExecutor(max_workers=IMPORTACION_WORKERS, thread_name_prefix="importacion")
+
+
+class ColaLlena(Exception):
+    """Hay demasiados trabajos pendientes o en proceso."""
+
+
+def _trabajos_activos(db: Session) -> int:
+    return db.query(models.TrabajoImportacion).filter(
+        models.TrabajoImportacion.estado.in_(ACTIVOS)
+    ).count()
+
+
+def vencer_trabajos(db: Session) -> int:
+    """Marca como fallidos los trabajos activos más antiguos que IMPORTACION_VENCIMIENTO; devuelve cuántos."""
+    limite = datetime.utcnow() - timedelta(seconds=IMPORTACION_VENCIMIENTO)
+    vencidos = db.query(models.TrabajoImportacion).filter(
+        models.TrabajoImportacion.estado.in_(ACTIVOS),
+        func.coalesce(models.TrabajoImportacion.fecha_inicio, models.TrabajoImportacion.fecha_creacion) < limite,
+    ).all()
+    for trabajo in vencidos:
+        _fallar(trabajo, "Importación interrumpida: el trabajo no terminó (reinicio o caída del proceso)")
+    db.commit()
+    if vencidos:
+        logger.warning("Se marcaron %d importaciones vencidas como fallidas", len(vencidos))
+    return len(vencidos)
+
+
+def _fallar(trabajo: models.TrabajoImportacion, mensaje: str):
+    errores = json.loads(trabajo.errores) if trabajo.errores else []
+    errores.append(mensaje)
+    trabajo.estado = "fallido"
+    trabajo.errores = json.dumps(errores[-MAX_ERRORES_GUARDADOS:], ensure_ascii=False)
+    trabajo.fecha_fin = datetime.utcnow()
+
+
+def encolar_importacion(
+    fabrica_sesion: sessionmaker, ruta: str, nombre_archivo: str, modo: str = "crear"
+) -> models.TrabajoImportacion:
+    """Registra el trabajo y lo envía al pool. `ruta` se elimina al terminar."""
+    db = fabrica_sesion()
+    try:
+        vencer_trabajos(db)
+        if _trabajos_activos(db) >= IMPORTACION_MAX_PENDIENTES:
+            raise ColaLlena()
+        trabajo = models.TrabajoImportacion(id=uuid.uuid4().hex, nombre_archivo=nombre_archivo, estado="pendiente")
+        db.add(trabajo)
+        db.commit()
+        db.refresh(trabajo)
+    finally:
+        db.close()
+    futuro = _executor.submit(_ejecutar, fabrica_sesion, trabajo.id, ruta, modo)
+    futuro.add_done_callback(lambda f: _al_terminar(f, fabrica_sesion, trabajo.id))
+    return trabajo
+
+
+def _al_terminar(futuro: Future, fabrica_sesion: sessionmaker, trabajo_id: str):
+    """
+    _ejecutar registra los errores de la importación en el trabajo; esto cubre
+    lo que escapa de ahí (la sesión, el archivo, un pool cerrado con el trabajo
+    en cola), que de otro modo dejaría el trabajo activo ocupando la cola.
+    """
+    if futuro.cancelled():
+        mensaje = "Importación interrumpida: el trabajo se canceló antes de empezar"
+    elif futuro.exception() is not None:
+        logger.error("Falló la importación %s", trabajo_id, exc_info=futuro.exception())
+        mensaje = f"Importación interrumpida: {futuro.exception()}"
+    else:
+        return
+    db = fabrica_sesion()
+    try:
+        trabajo = db.get(models.TrabajoImportacion, trabajo_id)
+        if trabajo is not None and trabajo.estado in ACTIVOS:
+            _fallar(trabajo, mensaje)
+            db.commit()
+    except Exception:
+        logger.exception("No se pudo marcar como fallida la importación %s", trabajo_id)
+    finally:
+        db.close()
+
+
+def _ejecutar(fabrica_sesion: sessionmaker, trabajo_id: str, ruta: str, modo: str):
+    db = fabrica_sesion()
+    errores: list[str] = []
+    try:
+        trabajo = db.get(models.TrabajoImportacion, trabajo_id)
+        trabajo.estado = "en_proceso"
+        trabajo.fecha_inicio = datetime.utcnow()
+        db.commit()
+
+        def al_avanzar(filas: int, errores_bloque: list[str], creadas: int, actualizadas: int):
+            errores.extend(errores_bloque)
+            trabajo.filas_procesadas += filas
+            trabajo.filas_fallidas += len(errores_bloque)
+            trabajo.creadas += creadas
+            trabajo.actualizadas += actualizadas
+            trabajo.errores = json.dumps(errores[:MAX_ERRORES_GUARDADOS], ensure_ascii=False)
+            db.commit()
+
+        try:
+            importacion.importar_bloques(db, importacion.bloques_xlsx(ruta, TAMANO_BLOQUE), modo, al_avanzar)
+            trabajo.estado = "completado"
+        except Exception as e:
+            db.rollback()
+            errores.append(f"Importación interrumpida: {e}")
+            trabajo.estado = "fallido"
+            trabajo.errores = json.dumps(errores[-MAX_ERRORES_GUARDADOS:], ensure_ascii=False)
+        trabajo.fecha_fin = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+        os.remove(ruta)
+
+
+def estado(trabajo: models.TrabajoImportacion) -> dict:
+    """Estado del trabajo con el throughput en filas por segundo."""
+    velocidad = 0.0
+    if trabajo.fecha_inicio:
+        duracion = ((trabajo.fecha_fin or datetime.utcnow()) - trabajo.fecha_inicio).total_seconds()
+        if duracion > 0:
+            velocidad = round(trabajo.filas_procesadas / duracion, 1)
+    return {
+        "id": trabajo.id,
+        "nombre_archivo": trabajo.nombre_archivo,
+        "estado": trabajo.estado,
+        "filas_procesadas": trabajo.filas_procesadas,
+        "filas_fallidas": trabajo.filas_fallidas,
+        "creadas": trabajo.creadas,
+        "actualizadas": trabajo.actualizadas,
+        "filas_por_segundo": velocidad,
+        "errores": json.loads(trabajo.errores) if trabajo.errores else [],
+        "fecha_creacion": trabajo.fecha_creacion,
+        "fecha_inicio": trabajo.fecha_inicio,
+        "fecha_fin": trabajo.fecha_fin,
+    }
@@ -4,6 +4,12 @@ from app.main import app
 import sys
 import os
 from dotenv import load_dotenv
+import asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from app.db import Base, crear_engine, crear_engine_async, get_async_db, get_db, get_sessionmaker
+from app.auth import crear_token_de_acceso
+from app import migraciones
 load_dotenv()
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
@@ -11,6 +17,70 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 @pytest.fixture
 def client():
     return TestClient(app)
-    
-def test_login(client):
-    response = client.post("/login", data={...})
+
+
+@pytest.fixture
+def db_session(tmp_path):
+    """Base SQLite aislada por test; la app usa la misma base vía get_db y get_async_db."""
+    engine = crear_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    async_engine = crear_engine_async(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    Base.metadata.create_all(bind=engine)
+    migraciones.aplicar(engine)
+    TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def _get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = _get_db
+    app.dependency_overrides[get_async_db] = _get_async_db
+    app.dependency_overrides[get_sessionmaker] = lambda: TestingSessionLocal
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    app.dependency_overrides.clear()
+    engine.dispose()
+    asyncio.run(async_engine.dispose())
+
+
+@pytest.fixture(autouse=True)
+def cache_resumenes(tmp_path, monkeypatch):
+    """Caché de resúmenes vacía por test, con su nivel de disco en tmp_path."""
+    from app import cache_resumen
+    cache = cache_resumen.CacheResumenes(str(tmp_path / "resumen_cache.db"), 16, 100, 3600)
+    monkeypatch.setattr(cache_resumen, "cache", cache)
+    yield cache
+    cache.cerrar()
+
+
+@pytest.fixture(autouse=True)
+def cache_usuarios_vacia():
+    """Cada test parte sin perfiles cacheados (las bases de test reutilizan correos)."""
+    from app import cache_usuarios
+    cache_usuarios.cache.limpiar()
+    yield cache_usuarios.cache
+
+
+@pytest.fixture(autouse=True)
+def cache_plantillas_vacia():
+    """Las plantillas compiladas pertenecen a la base del test anterior."""
+    from app import plantillas
+    plantillas.cache.invalidar()
+    yield plantillas.cache
+
+
+@pytest.fixture
+def headers_para():
+    """Genera encabezados Authorization con un JWT válido para (correo, rol)."""
+    def _headers(correo: str, rol: str) -> dict:
+        token = crear_token_de_acceso({"sub": correo, "rol": rol})
+        return {"Authorization": f"Bearer {token}"}
+    return _headers
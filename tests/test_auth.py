@@ -1,4 +1,6 @@
+from datetime import timedelta
 from fastapi.testclient import TestClient
+from app import auth, crud, models, schemas
 from app.main import app
 
 client = TestClient(app)
@@ -10,3 +12,67 @@ def test_login_usuario_invalido():
     })
     assert response.status_code == 401
     assert response.json()["detail"] == "Credenciales inválidas"
+
+def test_login_rehashea_al_cambiar_el_costo(client, db_session, headers_para, monkeypatch):
+    monkeypatch.setattr(auth, "pwd_context", auth.crear_contexto(4))
+    crud.crear_usuario(db_session, schemas.UsuarioCreate(
+        nombre_completo="Ana", correo="ana@example.com", password="clave-segura", rol="abogado",
+    ))
+    # Subir el costo: el siguiente login exitoso rehashea con el nuevo costo
+    monkeypatch.setattr(auth, "pwd_context", auth.crear_contexto(5))
+    assert client.post("/login", data={"username": "ana@example.com", "password": "incorrecta"}).status_code == 401
+    res = client.post("/login", data={"username": "ana@example.com", "password": "clave-segura"})
+    assert res.status_code == 200 and "access_token" in res.json()
+
+    db_session.expire_all()
+    usuario = db_session.query(models.Usuario).filter_by(correo="ana@example.com").one()
+    assert usuario.hashed_password.startswith("$2b$05$")
+
+    metricas = client.get("/metricas/hash", headers=headers_para("admin@example.com", "admin")).json()
+    assert metricas["operaciones"] >= 3 and metricas["p99_ms"] is not None
+
+def test_hashing_saturado_responde_503(client, db_session, headers_para, monkeypatch):
+    monkeypatch.setattr(auth, "HASH_MAX_PENDIENTES", 0)
+    res = client.post("/usuarios", json={
+        "nombre_completo": "Ana", "correo": "ana@example.com", "password": "clave-segura", "rol": "abogado",
+    }, headers=headers_para("admin@example.com", "admin"))
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+def test_registro_no_bloquea_el_event_loop(client, db_session, headers_para, monkeypatch):
+    def bloqueante(*args):
+        raise AssertionError("la ruta async debe esperar el hash con hash_password_async")
+
+    monkeypatch.setattr(auth, "pwd_context", auth.crear_contexto(4))
+    monkeypatch.setattr(auth, "hash_password", bloqueante)
+    res = client.post("/usuarios", json={
+        "nombre_completo": "Ana", "correo": "ana@example.com", "password": "clave-segura", "rol": "abogado",
+    }, headers=headers_para("admin@example.com", "admin"))
+    assert res.status_code == 200
+    assert client.post("/login", data={"username": "ana@example.com", "password": "clave-segura"}).status_code == 200
+
+def test_token_verificado_se_cachea_hasta_exp(client, db_session, monkeypatch):
+    auth.limpiar_cache_tokens()
+    verificaciones = []
+    verificar_original = auth.verificar_token
+
+    def contar(token):
+        verificaciones.append(token)
+        return verificar_original(token)
+
+    monkeypatch.setattr(auth, "verificar_token", contar)
+    token = auth.crear_token_de_acceso({"sub": "ana@example.com", "rol": "abogado"})
+    headers = {"Authorization": f"Bearer {token}"}
+    for _ in range(3):
+        assert client.get("/causas", headers=headers).status_code == 200
+    assert len(verificaciones) == 1
+
+    # Un token vencido no entra a la caché y se sigue rechazando
+    vencido = auth.crear_token_de_acceso({"sub": "ana@example.com", "rol": "abogado"}, timedelta(seconds=-1))
+    for _ in range(2):
+        assert client.get("/causas", headers={"Authorization": f"Bearer {vencido}"}).status_code == 401
+    assert len(verificaciones) == 3
+
+    # Entrada cacheada cuyo exp ya pasó: se descarta y se vuelve a verificar
+    auth._cachear_token(vencido, 0, auth.TokenData(sub="ana@example.com", rol="abogado"))
+    assert client.get("/causas", headers={"Authorization": f"Bearer {vencido}"}).status_code == 401
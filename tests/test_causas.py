@@ -1,6 +1,11 @@
+import csv
+import io
+import json
+from datetime import date
 import pytest
 from fastapi.testclient import TestClient
-from app import schemas
+from sqlalchemy import event
+from app import busqueda, crud, importacion, models, schemas
 
 @pytest.fixture(scope="module")
 def abogado_token(client: TestClient):
@@ -64,3 +69,224 @@ def test_checklist_generado(client: TestClient, abogado_token):
     assert len(tareas) == 3
     nombres = [t.tarea_nombre for t in tareas]
     assert "Revisar patrocinio" in nombres
+
+def test_listar_causas_paginado(client: TestClient, db_session, headers_para):
+    for i in range(5):
+        crud.crear_causa(db_session, schemas.CausaCreate(
+            rit=f"C-{i}", representado="Cliente", tribunal="Juzgado Civil" if i % 2 else "Juzgado Laboral",
+            abogado_responsable="ana@example.com", fecha_ingreso=date(2025, 1, i + 1),
+        ))
+    headers = headers_para("ana@example.com", "abogado")
+
+    res = client.get("/causas", params={"limite": 2}, headers=headers)
+    assert [c["rit"] for c in res.json()] == ["C-0", "C-1"]
+    cursor = res.headers["X-Siguiente-Cursor"]
+
+    res = client.get("/causas", params={"limite": 2, "cursor": cursor}, headers=headers)
+    assert [c["rit"] for c in res.json()] == ["C-2", "C-3"]
+
+    res = client.get("/causas", params={"limite": 2, "cursor": res.headers["X-Siguiente-Cursor"]}, headers=headers)
+    assert [c["rit"] for c in res.json()] == ["C-4"]
+    assert "X-Siguiente-Cursor" not in res.headers
+
+    res = client.get(
+        "/causas",
+        params={"tribunal": "Juzgado Civil", "fecha_desde": "2025-01-03", "orden": "desc"},
+        headers=headers,
+    )
+    assert [c["rit"] for c in res.json()] == ["C-3"]
+
+def test_exportar_causas_ndjson_y_csv(client: TestClient, db_session, headers_para):
+    for rit in ["C-1", "C-2"]:
+        causa = crud.crear_causa(db_session, schemas.CausaCreate(
+            rit=rit, representado="Cliente", tribunal="Juzgado Civil",
+            abogado_responsable="ana@example.com", fecha_ingreso=date(2025, 1, 1),
+        ))
+        crud.crear_checklist_base(db_session, causa.id)
+    headers = headers_para("admin@example.com", "admin")
+
+    res = client.get("/causas/exportar", headers=headers)
+    assert res.status_code == 200
+    lineas = [json.loads(l) for l in res.text.splitlines()]
+    assert [c["rit"] for c in lineas] == ["C-1", "C-2"]
+    assert len(lineas[0]["checklist"]) == 3
+    assert lineas[0]["fecha_ingreso"] == "2025-01-01"
+
+    res = client.get("/causas/exportar", params={"formato": "csv"}, headers=headers)
+    filas = list(csv.DictReader(io.StringIO(res.text)))
+    assert len(filas) == 6
+    assert filas[0]["rit"] == "C-1" and filas[0]["tarea_nombre"] == "Revisar patrocinio"
+
+def test_checklist_y_tarea_via_sesion_async(client: TestClient, db_session, headers_para):
+    causa = crud.crear_causa(db_session, schemas.CausaCreate(
+        rit="C-1", representado="Cliente", tribunal="Juzgado Civil",
+        abogado_responsable="ana@example.com", fecha_ingreso=date(2025, 1, 1),
+    ))
+    crud.crear_checklist_base(db_session, causa.id)
+    headers = headers_para("ana@example.com", "abogado")
+
+    tareas = client.get(f"/causas/{causa.id}/checklist", headers=headers).json()
+    res = client.put(f"/tareas/{tareas[0]['id']}", json={"completada": True}, headers=headers)
+    assert res.status_code == 200
+    assert res.json()["fecha_completada"] == date.today().isoformat()
+
+    rollup = db_session.query(models.CumplimientoSemanal).filter_by(causa_id=causa.id, semana="total").one()
+    assert rollup.completadas == 1
+    assert client.get("/causas/999", headers=headers).status_code == 404
+
+def test_buscar_causas_fts(client: TestClient, db_session, headers_para, monkeypatch):
+    crud.crear_causas_bulk(db_session, [
+        {"rit": "C-100-2025", "representado": "José González", "tribunal": "1° Juzgado Civil de Santiago",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 1)},
+        {"rit": "C-200-2025", "representado": "Inmobiliaria Los Robles", "tribunal": "Juzgado de Letras de Talca",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 2)},
+        {"rit": "C-300-2025", "representado": "María Soto", "tribunal": "2° Juzgado Civil de Santiago",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 3)},
+    ])
+    headers = headers_para("ana@example.com", "abogado")
+
+    def buscar(q, **params):
+        return client.get("/causas/buscar", params={"q": q, **params}, headers=headers)
+
+    # Prefijo y sin tildes
+    assert [c["rit"] for c in buscar("gonz").json()] == ["C-100-2025"]
+    assert {c["rit"] for c in buscar("civil santiago").json()} == {"C-100-2025", "C-300-2025"}
+    assert buscar('robles" (').json()[0]["rit"] == "C-200-2025"
+
+    # Paginado
+    res = buscar("santiago", limite=1)
+    assert res.headers["X-Siguiente-Desplazamiento"] == "1"
+    segunda = buscar("santiago", limite=1, desplazamiento=1)
+    assert len(segunda.json()) == 1 and segunda.json()[0]["rit"] != res.json()[0]["rit"]
+    # Página final completa: no anuncia una siguiente vacía
+    assert "X-Siguiente-Desplazamiento" not in segunda.headers
+
+    # Los triggers siguen los comentarios de tareas y las actualizaciones vía upsert
+    clave = ("C-300-2025", "2° Juzgado Civil de Santiago")
+    causa = crud.obtener_causa(db_session, crud.causas_existentes(db_session, [clave])[clave])
+    tarea = crud.obtener_checklist_por_causa(db_session, causa.id)[0]
+    assert client.put(f"/tareas/{tarea.id}", json={"completada": False, "comentarios": "Falta notificar al demandado"}, headers=headers).status_code == 200
+    assert [c["id"] for c in buscar("notificar").json()] == [causa.id]
+    # Sin FTS5 (otras bases) también se buscan los comentarios
+    with monkeypatch.context() as m:
+        m.setattr(busqueda, "disponible", lambda db: False)
+        assert [c["id"] for c in buscar("notificar").json()] == [causa.id]
+    importacion.guardar_registros(db_session, [
+        {"fila": 2, "rit": "C-300-2025", "representado": "María Soto Pérez", "tribunal": "2° Juzgado Civil de Santiago",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 3)},
+    ], "upsert")
+    assert [c["id"] for c in buscar("perez").json()] == [causa.id]
+
+def test_actualizar_tareas_en_lote(client: TestClient, db_session, headers_para):
+    [causa_id] = crud.crear_causas_bulk(db_session, [
+        {"rit": "C-1", "representado": "Cliente", "tribunal": "Juzgado Civil",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 1)},
+    ])
+    tareas = crud.obtener_checklist_por_causa(db_session, causa_id)
+    headers = headers_para("ana@example.com", "abogado")
+
+    # Tareas inexistentes: 404 y no se modifica nada
+    res = client.put("/tareas", json={"tareas": [
+        {"id": tareas[0].id, "completada": True},
+        {"causa_id": causa_id, "tarea_nombre": "No existe", "completada": True},
+    ]}, headers=headers)
+    assert res.status_code == 404
+    assert res.json()["detail"]["faltantes"] == [f"'No existe' de la causa {causa_id}"]
+    db_session.expire_all()
+    assert not any(t.completada for t in crud.obtener_checklist_por_causa(db_session, causa_id))
+
+    res = client.put("/tareas", json={"tareas": [
+        {"id": tareas[0].id, "completada": True},
+        {"causa_id": causa_id, "tarea_nombre": tareas[1].tarea_nombre, "completada": True},
+        {"id": tareas[2].id, "completada": False, "comentarios": "Pendiente de notificación"},
+    ]}, headers=headers)
+    assert res.status_code == 200
+    assert [(t["id"], t["completada"]) for t in res.json()] == [
+        (tareas[0].id, True), (tareas[1].id, True), (tareas[2].id, False),
+    ]
+    assert res.json()[0]["fecha_completada"] == date.today().isoformat()
+    assert res.json()[2]["comentarios"] == "Pendiente de notificación"
+
+    rollup = db_session.query(models.CumplimientoSemanal).filter_by(causa_id=causa_id, semana="total").one()
+    assert rollup.completadas == 2
+
+    assert client.put("/tareas", json={"tareas": [{"completada": True}]}, headers=headers).status_code == 422
+
+    # La misma tarea dos veces (por id y por nombre): 422 y no se modifica nada
+    res = client.put("/tareas", json={"tareas": [
+        {"id": tareas[2].id, "completada": True},
+        {"causa_id": causa_id, "tarea_nombre": tareas[2].tarea_nombre, "completada": False},
+    ]}, headers=headers)
+    assert res.status_code == 422
+    assert res.json()["detail"]["repetidas"] == [f"'{tareas[2].tarea_nombre}' de la causa {causa_id}"]
+    db_session.expire_all()
+    assert db_session.get(models.ChecklistTarea, tareas[2].id).completada is False
+
+    # Un solo UPDATE (executemany) aunque cada tarea traiga su propio comentario
+    updates = []
+    contar = lambda conn, cursor, sql, *args: updates.append(sql) if sql.startswith("UPDATE checklist_tareas") else None
+    event.listen(db_session.get_bind(), "before_cursor_execute", contar)
+    try:
+        actualizadas, _, _ = crud.actualizar_tareas_lote(db_session, [
+            schemas.ChecklistTareaLoteItem(id=t.id, completada=False, comentarios=f"Nota {i}")
+            for i, t in enumerate(tareas)
+        ])
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", contar)
+    assert len(updates) == 1
+    assert [t.comentarios for t in actualizadas] == [f"Nota {i}" for i in range(len(tareas))]
+
+def test_checklist_segun_plantilla(client: TestClient, db_session, headers_para):
+    admin = headers_para("admin@example.com", "admin")
+    tareas_familia = [f"Trámite {i}" for i in range(30)]
+    res = client.post("/plantillas-checklist", json={
+        "nombre": "Familia", "tribunal": "Juzgado de Familia", "tareas": tareas_familia,
+    }, headers=admin)
+    assert res.status_code == 200 and res.json()["tareas"] == tareas_familia
+    general = client.post("/plantillas-checklist", json={
+        "nombre": "General", "tareas": ["Revisar expediente", "Agendar audiencia"],
+    }, headers=admin).json()
+    assert client.post("/plantillas-checklist", json={
+        "nombre": "Otra", "tribunal": "Juzgado de Familia", "tareas": ["x"],
+    }, headers=admin).status_code == 409
+
+    # Una sola plantilla general, al crear o al reemplazar
+    assert client.post("/plantillas-checklist", json={
+        "nombre": "Otra general", "tareas": ["c"],
+    }, headers=admin).status_code == 409
+    familia_id = client.get("/plantillas-checklist", headers=admin).json()[0]["id"]
+    assert client.put(f"/plantillas-checklist/{familia_id}", json={
+        "nombre": "Familia", "tareas": tareas_familia,
+    }, headers=admin).status_code == 409
+
+    consultas_plantillas = []
+    contar = lambda conn, cursor, sql, *args: consultas_plantillas.append(sql) if "plantillas_checklist" in sql else None
+    event.listen(db_session.get_bind(), "before_cursor_execute", contar)
+    try:
+        for i in range(3):
+            res = client.post("/causas", json={
+                "rit": f"F-{i}", "representado": "Cliente", "tribunal": "Juzgado de Familia",
+                "abogado_responsable": "ana@example.com", "fecha_ingreso": "2025-01-01",
+            }, headers=admin)
+            assert res.status_code == 200
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", contar)
+    # Plantillas compiladas una vez y servidas desde memoria
+    assert len(consultas_plantillas) == 1
+    checklist = client.get(f"/causas/{res.json()['id']}/checklist", headers=admin).json()
+    assert [t["tarea_nombre"] for t in checklist] == tareas_familia
+
+    assert crud.tareas_checklist(db_session, "Juzgado de Policía Local") == ("Revisar expediente", "Agendar audiencia")
+    [otra] = crud.crear_causas_bulk(db_session, [
+        {"rit": "C-1", "representado": "Cliente", "tribunal": "Juzgado Civil",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 1)},
+    ])
+    assert [t.tarea_nombre for t in crud.obtener_checklist_por_causa(db_session, otra)] == ["Revisar expediente", "Agendar audiencia"]
+
+    # Sin plantilla aplicable se usa el checklist por defecto
+    assert client.delete(f"/plantillas-checklist/{general['id']}", headers=admin).status_code == 204
+    [sin_plantilla] = crud.crear_causas_bulk(db_session, [
+        {"rit": "C-2", "representado": "Cliente", "tribunal": "Juzgado Civil",
+         "abogado_responsable": "ana@example.com", "fecha_ingreso": date(2025, 1, 1)},
+    ])
+    assert [t.tarea_nombre for t in crud.obtener_checklist_por_causa(db_session, sin_plantilla)] == crud.TAREAS_BASE
@@ -0,0 +1,59 @@
+import asyncio
+import httpx
+import pytest
+from app import huggingface
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Reemplaza la red por un handler y deja un circuito nuevo sin esperas reales."""
+    respuestas = []
+    llamadas = []
+
+    def handler(request):
+        llamadas.append(request)
+        return respuestas.pop(0) if respuestas else httpx.Response(200, json=[{"summary_text": "ok"}])
+
+    def recursos():
+        return httpx.AsyncClient(transport=httpx.MockTransport(handler)), asyncio.Semaphore(2)
+
+    monkeypatch.setattr(huggingface, "_recursos_del_loop", recursos)
+    monkeypatch.setattr(huggingface, "circuito", huggingface.Circuito(umbral=2, espera=60))
+    monkeypatch.setattr(huggingface, "HF_BACKOFF_BASE", 0.001)
+    return respuestas, llamadas
+
+def test_reintenta_503_y_429(backend):
+    respuestas, llamadas = backend
+    respuestas += [
+        httpx.Response(503, json={"error": "Model is loading", "estimated_time": 0.01}),
+        httpx.Response(429, headers={"Retry-After": "0"}),
+    ]
+    assert asyncio.run(huggingface.generar_texto("modelo", "texto")) == "ok"
+    assert len(llamadas) == 3
+    assert huggingface.circuito.estado == "cerrado"
+
+def test_circuito_abre_y_falla_rapido(backend, monkeypatch):
+    respuestas, llamadas = backend
+    monkeypatch.setattr(huggingface, "HF_REINTENTOS", 0)
+    respuestas += [httpx.Response(500, text="error"), httpx.Response(500, text="error")]
+    for _ in range(2):
+        with pytest.raises(huggingface.ErrorInferencia):
+            asyncio.run(huggingface.generar_texto("modelo", "texto"))
+    assert huggingface.circuito.estado == "abierto"
+
+    with pytest.raises(huggingface.ErrorInferencia) as error:
+        asyncio.run(huggingface.generar_texto("modelo", "texto"))
+    assert error.value.status_code == 503
+    assert len(llamadas) == 2
+
+    # Pasada la espera, una prueba exitosa cierra el circuito
+    huggingface.circuito.abierto_desde -= 60
+    assert asyncio.run(huggingface.generar_texto("modelo", "texto")) == "ok"
+    assert huggingface.circuito.estado == "cerrado"
+
+def test_sin_cupo_falla_rapido(backend, monkeypatch):
+    monkeypatch.setattr(huggingface, "HF_ESPERA_COLA", 0.01)
+    semaforo = asyncio.Semaphore(0)
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200)))
+    monkeypatch.setattr(huggingface, "_recursos_del_loop", lambda: (cliente, semaforo))
+    with pytest.raises(huggingface.ErrorInferencia, match="demasiados"):
+        asyncio.run(huggingface.inferir("modelo", {"inputs": "x"}))
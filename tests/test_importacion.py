@@ -0,0 +1,163 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app import importacion, models, trabajos
+from app.db import get_sessionmaker
+from app.main import app
+
+def _planilla(filas: list[dict]) -> bytes:
+    buffer = BytesIO()
+    pd.DataFrame(filas).to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+def _fila(rit, **cambios):
+    fila = {
+        "RIT": rit,
+        "Representado": "Cliente",
+        "Tribunal": "Juzgado Civil",
+        "Abogado responsable": "ana@example.com",
+        "Fecha ingreso": "2025-05-27",
+    }
+    fila.update(cambios)
+    return fila
+
+def test_importar_causas_en_bloque(client: TestClient, db_session, headers_para):
+    contenido = _planilla([_fila("C-1"), _fila("C-2"), _fila("C-3")])
+    res = client.post(
+        "/importar-causas",
+        files={"file": ("causas.xlsx", contenido)},
+        headers=headers_para("ana@example.com", "abogado"),
+    )
+    assert res.status_code == 200
+    assert db_session.query(models.Causa).count() == 3
+    assert db_session.query(models.ChecklistTarea).count() == 9
+    assert [f.total_tareas for f in db_session.query(models.CumplimientoSemanal).all()] == [3, 3, 3]
+
+def test_importar_causas_reporta_errores_por_fila(client: TestClient, db_session, headers_para):
+    contenido = _planilla([
+        _fila("C-1"),
+        _fila("C-2", Representado=None),
+        _fila("C-3", **{"Fecha ingreso": "no es fecha"}),
+    ])
+    res = client.post(
+        "/importar-causas",
+        files={"file": ("causas.xlsx", contenido)},
+        headers=headers_para("ana@example.com", "abogado"),
+    )
+    assert res.status_code == 422
+    detalle = res.json()["detail"]
+    assert detalle["creadas"] == 1
+    assert detalle["errores"] == ["Fila 3: falta Representado", "Fila 4: Fecha ingreso inválida"]
+    assert [c.rit for c in db_session.query(models.Causa).all()] == ["C-1"]
+
+def test_importar_causas_en_segundo_plano(client: TestClient, db_session, headers_para):
+    headers = headers_para("ana@example.com", "abogado")
+    contenido = _planilla([_fila("C-1"), _fila("C-2", Tribunal=None), _fila("C-3")])
+    res = client.post("/importar-causas/trabajos", files={"file": ("causas.xlsx", contenido)}, headers=headers)
+    assert res.status_code == 202
+    trabajo_id = res.json()["id"]
+
+    for _ in range(100):
+        estado = client.get(f"/importar-causas/trabajos/{trabajo_id}", headers=headers).json()
+        if estado["estado"] in ("completado", "fallido"):
+            break
+        time.sleep(0.05)
+    assert estado["estado"] == "completado"
+    assert estado["filas_procesadas"] == 3
+    assert estado["filas_fallidas"] == 1
+    assert estado["creadas"] == 2
+    assert estado["errores"] == ["Fila 3: falta Tribunal"]
+
+def test_importar_causas_streaming_por_bloques(client: TestClient, db_session, headers_para, monkeypatch):
+    monkeypatch.setattr(trabajos, "TAMANO_BLOQUE", 2)
+    filas = [_fila(f"C-{i}") for i in range(5)]
+    filas[3]["Representado"] = " "
+    res = client.post(
+        "/importar-causas",
+        params={"streaming": True},
+        files={"file": ("causas.xlsx", _planilla(filas))},
+        headers=headers_para("ana@example.com", "abogado"),
+    )
+    assert res.status_code == 422
+    assert res.json()["detail"] == {"creadas": 4, "errores": ["Fila 5: falta Representado"]}
+    assert db_session.query(models.Causa).count() == 4
+
+def test_bloques_xlsx_valida_encabezado(tmp_path):
+    ruta = tmp_path / "malo.xlsx"
+    ruta.write_bytes(_planilla([{"RIT": "C-1"}]))
+    with pytest.raises(ValueError, match="Faltan columnas"):
+        list(importacion.bloques_xlsx(str(ruta), 10))
+
+def test_importar_causas_upsert_idempotente(client: TestClient, db_session, headers_para):
+    headers = headers_para("ana@example.com", "abogado")
+    contenido = _planilla([_fila("C-1"), _fila("C-2")])
+    res = client.post("/importar-causas", files={"file": ("causas.xlsx", contenido)}, headers=headers)
+    assert res.status_code == 200
+
+    # Reimportar sin upsert: las causas ya existen y se informan por fila
+    res = client.post("/importar-causas", files={"file": ("causas.xlsx", contenido)}, headers=headers)
+    assert res.status_code == 422
+    assert res.json()["detail"]["creadas"] == 0
+    assert res.json()["detail"]["errores"][0] == "Fila 2: la causa C-1 ya existe en Juzgado Civil"
+
+    corregida = _planilla([_fila("C-1"), _fila("C-2", Representado="Otro Cliente"), _fila("C-3")])
+    res = client.post(
+        "/importar-causas", params={"modo": "upsert"},
+        files={"file": ("causas.xlsx", corregida)}, headers=headers,
+    )
+    assert res.status_code == 200
+    assert (res.json()["creadas"], res.json()["actualizadas"]) == (1, 1)
+
+    res = client.post(
+        "/importar-causas", params={"modo": "upsert", "streaming": True},
+        files={"file": ("causas.xlsx", corregida)}, headers=headers,
+    )
+    assert (res.json()["creadas"], res.json()["actualizadas"]) == (0, 0)
+    assert db_session.query(models.Causa).count() == 3
+    assert db_session.query(models.ChecklistTarea).count() == 9
+    assert db_session.query(models.Causa).filter_by(rit="C-2").one().representado == "Otro Cliente"
+
+def test_importar_causas_rit_repetido_en_planilla(client: TestClient, db_session, headers_para):
+    contenido = _planilla([_fila("C-1"), _fila("C-1"), _fila("C-1", Tribunal="Juzgado Laboral")])
+    res = client.post(
+        "/importar-causas",
+        files={"file": ("causas.xlsx", contenido)},
+        headers=headers_para("ana@example.com", "abogado"),
+    )
+    assert res.json()["detail"] == {
+        "creadas": 2,
+        "errores": ["Fila 3: RIT repetido en la planilla para el mismo tribunal"],
+    }
+
+def test_trabajos_vencidos_no_ocupan_la_cola(db_session, monkeypatch):
+    monkeypatch.setattr(trabajos, "IMPORTACION_VENCIMIENTO", 60)
+    antiguo = datetime.utcnow() - timedelta(minutes=5)
+    db_session.add_all([
+        models.TrabajoImportacion(id="a", nombre_archivo="a.xlsx", estado="en_proceso", fecha_inicio=antiguo),
+        models.TrabajoImportacion(id="b", nombre_archivo="b.xlsx", estado="pendiente", fecha_creacion=antiguo),
+        models.TrabajoImportacion(id="c", nombre_archivo="c.xlsx", estado="en_proceso", fecha_inicio=datetime.utcnow()),
+    ])
+    db_session.commit()
+
+    assert trabajos.vencer_trabajos(db_session) == 2
+    estados = {t.id: t.estado for t in db_session.query(models.TrabajoImportacion)}
+    assert estados == {"a": "fallido", "b": "fallido", "c": "en_proceso"}
+    assert trabajos.estado(db_session.get(models.TrabajoImportacion, "a"))["errores"][-1].startswith("Importación interrumpida")
+
+def test_trabajo_que_falla_fuera_de_la_importacion_queda_fallido(db_session, monkeypatch, tmp_path):
+    def romper(fabrica_sesion, trabajo_id, ruta, modo):
+        raise RuntimeError("disco lleno")
+    monkeypatch.setattr(trabajos, "_ejecutar", romper)
+    # Con un solo hilo, el callback corre antes de que el pool tome la tarea siguiente
+    monkeypatch.setattr(trabajos, "_executor", ThreadPoolExecutor(max_workers=1))
+    trabajo = trabajos.encolar_importacion(app.dependency_overrides[get_sessionmaker](), str(tmp_path / "x.xlsx"), "x.xlsx")
+    trabajos._executor.submit(lambda: None).result()
+
+    db_session.expire_all()
+    fallido = trabajos.estado(db_session.get(models.TrabajoImportacion, trabajo.id))
+    assert fallido["estado"] == "fallido"
+    assert fallido["errores"] == ["Importación interrumpida: disco lleno"]
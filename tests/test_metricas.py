@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from datetime import date
+from app import crud, cumplimiento, models, schemas
 
 @pytest.fixture(scope="module")
 def supervisor_token(client: TestClient):
@@ -36,3 +37,70 @@ def test_reporte_supervision(client: TestClient, supervisor_token):
     data = res.json()
     assert "resumen" in data
     assert isinstance(data["resumen"], list)
+
+def _sembrar_causas(db_session):
+    db_session.add_all([
+        models.Usuario(nombre_completo="Ana Aboga", correo="ana@example.com", hashed_password="x", rol="abogado"),
+        models.Usuario(nombre_completo="Beto Abog", correo="beto@example.com", hashed_password="x", rol="abogado"),
+    ])
+    db_session.commit()
+    ids = []
+    for rit, abogado in [("C-1", "ana@example.com"), ("C-2", "ana@example.com"), ("C-3", "beto@example.com")]:
+        causa = crud.crear_causa(db_session, schemas.CausaCreate(
+            rit=rit, representado="Cliente", tribunal="Juzgado Civil",
+            abogado_responsable=abogado, fecha_ingreso=date(2025, 5, 27),
+        ))
+        crud.crear_checklist_base(db_session, causa.id)
+        ids.append(causa.id)
+    crud.actualizar_tarea_por_nombre(
+        db_session, ids[0], "Revisar patrocinio", schemas.ChecklistTareaUpdate(completada=True)
+    )
+    return ids
+
+def test_reporte_supervision_agregado(client: TestClient, db_session, headers_para):
+    _sembrar_causas(db_session)
+    headers = headers_para("jefa@example.com", "supervisor")
+    res = client.get("/metricas/supervision", headers=headers)
+    assert res.status_code == 200
+    resumen = {r["correo"]: r for r in res.json()["resumen"]}
+    assert resumen["ana@example.com"]["total_tareas"] == 6
+    assert resumen["ana@example.com"]["completadas_semana"] == 1
+    assert resumen["ana@example.com"]["detalle"] == [
+        {"rit": "C-1", "completadas": 1, "total": 3},
+        {"rit": "C-2", "completadas": 0, "total": 3},
+    ]
+    assert resumen["beto@example.com"]["porcentaje"] == 0
+
+    # Sin desglose: sólo los totales agregados por abogado
+    res = client.get("/metricas/supervision", params={"detalle": False}, headers=headers)
+    resumen = {r["correo"]: r for r in res.json()["resumen"]}
+    assert resumen["ana@example.com"]["total_tareas"] == 6
+    assert "detalle" not in resumen["ana@example.com"]
+
+def test_reporte_abogado_agregado(client: TestClient, db_session, headers_para):
+    _sembrar_causas(db_session)
+    res = client.get("/metricas/abogado", headers=headers_para("ana@example.com", "abogado"))
+    assert res.status_code == 200
+    causas = res.json()["causas"]
+    assert [c["rit"] for c in causas] == ["C-1", "C-2"]
+    assert causas[0]["completadas_semana"] == 1
+    assert causas[0]["pendientes"] == 2
+    assert causas[0]["estado"] == "🟡"
+
+def test_rollup_se_mantiene_y_reconstruye(db_session):
+    ids = _sembrar_causas(db_session)
+    semana = cumplimiento.semana_iso(date.today())
+
+    def filas():
+        return {
+            (f.causa_id, f.semana): (f.total_tareas, f.completadas)
+            for f in db_session.query(models.CumplimientoSemanal).all()
+        }
+
+    mantenidas = filas()
+    assert mantenidas[(ids[0], cumplimiento.SEMANA_TOTAL)] == (3, 1)
+    assert mantenidas[(ids[0], semana)] == (3, 1)
+    assert (ids[1], semana) not in mantenidas
+
+    cumplimiento.reconstruir(db_session)
+    assert filas() == mantenidas
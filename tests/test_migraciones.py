@@ -0,0 +1,61 @@
+from sqlalchemy import create_engine, inspect, text
+from app import migraciones
+from app.db import Base
+
+def _base_antigua(tmp_path):
+    """Esquema tal como lo dejaba create_all antes de los índices."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigua.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE causas (id INTEGER PRIMARY KEY, rit VARCHAR NOT NULL, representado VARCHAR NOT NULL, "
+            "tribunal VARCHAR NOT NULL, abogado_responsable VARCHAR NOT NULL, fecha_ingreso DATE NOT NULL)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE checklist_tareas (id INTEGER PRIMARY KEY, causa_id INTEGER NOT NULL, "
+            "tarea_nombre VARCHAR NOT NULL, completada BOOLEAN, comentarios VARCHAR, fecha_completada DATE)"
+        ))
+        conn.execute(text(
+            "INSERT INTO causas VALUES (1, 'C-1', 'Cliente', 'Juzgado Civil', 'ana@example.com', '2025-05-27')"
+        ))
+    return engine
+
+def _arrancar(engine):
+    """Como al iniciar la app: create_all para las tablas nuevas y luego las migraciones."""
+    Base.metadata.create_all(bind=engine)
+    return migraciones.aplicar(engine)
+
+def test_migraciones_sobre_base_existente(tmp_path):
+    engine = _base_antigua(tmp_path)
+    assert _arrancar(engine) == [1, 2, 3]
+
+    inspector = inspect(engine)
+    indices_causas = {i["name"] for i in inspector.get_indexes("causas")}
+    assert {"ux_causas_rit_tribunal", "ix_causas_abogado_id", "ix_causas_tribunal_id"} <= indices_causas
+    assert "ix_checklist_causa_completada" in {i["name"] for i in inspector.get_indexes("checklist_tareas")}
+    assert "causas_fts" in inspector.get_table_names()
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM causas")).scalar() == 1
+
+    # Idempotente: una segunda ejecución no hace nada
+    assert migraciones.aplicar(engine) == []
+
+def test_migracion_unicidad_con_duplicados_no_impide_arrancar(tmp_path, caplog):
+    engine = _base_antigua(tmp_path)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO causas VALUES (2, 'C-1', 'Cliente', 'Juzgado Civil', 'ana@example.com', '2025-05-27')"
+        ))
+        conn.execute(text(
+            "INSERT INTO checklist_tareas (id, causa_id, tarea_nombre, completada) VALUES "
+            "(1, 1, 'Revisar patrocinio', 0), (2, 2, 'Revisar patrocinio', 1), (3, 2, 'Verificar tramitación', 0)"
+        ))
+    # La 2 se omite con un aviso; las demás se aplican
+    assert _arrancar(engine) == [1, 3]
+    assert "C-1" in caplog.text and "--fusionar-duplicadas" in caplog.text
+
+    assert migraciones.fusionar_duplicadas(engine) == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM causas")).scalars().all() == [1]
+        tareas = conn.execute(text("SELECT causa_id, tarea_nombre FROM checklist_tareas ORDER BY id")).all()
+    assert tareas == [(1, "Revisar patrocinio"), (1, "Verificar tramitación")]
+    assert migraciones.aplicar(engine) == [2]
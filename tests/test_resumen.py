@@ -0,0 +1,317 @@
+import asyncio
+import io
+import zipfile
+from datetime import date
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app import cache_resumen, crud, extractivo, huggingface, models, pdf, resumidor, schemas
+from app.resumidor import Resumidor
+
+def pdf_con_texto(*paginas: str) -> bytes:
+    """PDF mínimo válido con una línea de texto por página."""
+    objetos = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(paginas)))
+    objetos.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(paginas)} >>")
+    objetos.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for i, texto in enumerate(paginas):
+        flujo = f"BT /F1 12 Tf 72 720 Td ({texto}) Tj ET"
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objetos.append(f"<< /Length {len(flujo)} >>\nstream\n{flujo}\nendstream")
+    salida = b"%PDF-1.4\n"
+    offsets = []
+    for n, objeto in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        salida += f"{n} 0 obj\n{objeto}\nendobj\n".encode("latin-1")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    salida += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return salida
+
+def test_resumen_pdf_extrae_fuera_del_loop(client: TestClient, monkeypatch):
+    enviados = []
+
+    async def inferir_falso(modelo, payload):
+        enviados.append(payload["inputs"])
+        return httpx.Response(200, json=[{"generated_text": "Resumen breve"}])
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    res = client.post("/resumen-pdf/", files={"file": ("fallo.pdf", pdf_con_texto("Sentencia primera", "Considerando"))})
+    assert res.json() == {"resumen": "Resumen breve"}
+    assert "Sentencia primera" in enviados[0] and "Considerando" in enviados[0]
+
+def test_resumen_pdf_timeout(client: TestClient, monkeypatch):
+    async def inferir_lento(modelo, payload):
+        raise httpx.ReadTimeout("sin respuesta")
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_lento)
+    res = client.post("/resumen-pdf/", files={"file": ("fallo.pdf", pdf_con_texto("Texto"))})
+    assert res.json() == {"error": "Error al generar resumen", "detalle": "Tiempo de espera agotado"}
+
+def test_dividir_en_ventanas_respeta_oraciones():
+    texto = " ".join(f"Oración número {i} del fallo." for i in range(200))
+    ventanas = resumidor.dividir_en_ventanas(texto, 300)
+    assert all(len(v) <= 300 for v in ventanas)
+    assert all(v.endswith(".") for v in ventanas)
+    assert " ".join(ventanas) == texto
+
+def test_map_reduce_sin_convergencia_usa_la_ultima_ronda(monkeypatch):
+    monkeypatch.setattr(resumidor, "RESUMEN_MAX_NIVELES", 1)
+    finales = []
+
+    async def resumir_ventana(fragmento):
+        return "parcial " * 3
+
+    async def combinar(texto):
+        finales.append(texto)
+        return "combinado " * 3
+
+    asyncio.run(resumidor.resumir_map_reduce("palabra " * 40, resumir_ventana, combinar, tamano=30))
+    # La reducción final recibe los resúmenes de la última ronda, no los parciales anteriores
+    assert finales[-1].startswith("combinado")
+    assert len(finales[-1]) <= 30
+
+def test_resumen_pdf_largo_map_reduce(client: TestClient, monkeypatch):
+    llamadas = {"map": 0, "reduce": 0, "simultaneas": 0, "max_simultaneas": 0}
+
+    async def inferir_falso(modelo, payload):
+        tipo = "reduce" if payload["inputs"].startswith("Combina") else "map"
+        llamadas[tipo] += 1
+        llamadas["simultaneas"] += 1
+        llamadas["max_simultaneas"] = max(llamadas["max_simultaneas"], llamadas["simultaneas"])
+        await asyncio.sleep(0.01)
+        llamadas["simultaneas"] -= 1
+        return httpx.Response(200, json=[{"generated_text": f"parcial {llamadas[tipo]}."}])
+
+    async def extraer_falso(contenido):
+        return "Considerando que la demanda fue presentada. " * 400   # ~18k caracteres
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    monkeypatch.setattr(pdf, "extraer_texto_async", extraer_falso)
+    monkeypatch.setattr(resumidor, "RESUMEN_CONCURRENCIA", 2)
+    res = client.post("/resumen-pdf/", files={"file": ("fallo.pdf", b"%PDF")})
+    assert res.json() == {"resumen": "parcial 1."}
+    assert llamadas["map"] == 6
+    assert llamadas["reduce"] == 1
+    assert llamadas["max_simultaneas"] == 2
+
+def test_resumir_texto_usa_cache(client: TestClient, monkeypatch, cache_resumenes):
+    llamadas = []
+
+    async def inferir_falso(modelo, payload):
+        llamadas.append(payload["inputs"])
+        return httpx.Response(200, json=[{"summary_text": "Resumen"}])
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    assert client.post("/resumir/", json={"texto": "El  tribunal\nresolvió."}).json() == {"resumen": "Resumen"}
+    # Mismo texto normalizado: no vuelve a llamar al modelo
+    assert client.post("/resumir/", json={"texto": "El tribunal resolvió. "}).json() == {"resumen": "Resumen"}
+    assert len(llamadas) == 1
+
+    # El nivel de disco sobrevive a un proceso nuevo (caché de memoria vacía)
+    nueva = cache_resumen.CacheResumenes(cache_resumenes.ruta, 16, 100, 3600)
+    monkeypatch.setattr(cache_resumen, "cache", nueva)
+    assert client.post("/resumir/", json={"texto": "El tribunal resolvió."}).json() == {"resumen": "Resumen"}
+    assert len(llamadas) == 1
+    estadisticas = client.get("/resumen-cache/estadisticas").json()
+    assert (estadisticas["hits_disco"], estadisticas["misses"], estadisticas["hit_ratio"]) == (1, 0, 1.0)
+    nueva.cerrar()
+
+def test_cache_distingue_prompts_y_ventana_del_map_reduce(monkeypatch, cache_resumenes):
+    llamadas = []
+
+    async def generar_falso(modelo, prompt):
+        llamadas.append(prompt)
+        return "Resumen"
+
+    monkeypatch.setattr(huggingface, "generar_texto", generar_falso)
+    r = resumidor.ResumidorHuggingFace("m", "{texto}", "Fragmento: {texto}", "Combinar: {texto}")
+    resumir = lambda: asyncio.run(resumidor.resumir_con_cache(r, "Texto breve."))
+    resumir()
+    r.prompt_combinar = "Unir: {texto}"
+    resumir()
+    monkeypatch.setattr(resumidor, "RESUMEN_VENTANA", 1000)
+    resumir()
+    resumir()
+    assert len(llamadas) == 3
+
+def test_resumir_texto_error_no_se_cachea(client: TestClient, monkeypatch):
+    respuestas = [httpx.Response(503, json={"error": "Model is loading"}), httpx.Response(200, json=[{"summary_text": "Ok"}])]
+
+    async def inferir_falso(modelo, payload):
+        return respuestas.pop(0)
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    res = client.post("/resumir/", json={"texto": "Texto"})
+    assert res.status_code == 503
+    assert client.post("/resumir/", json={"texto": "Texto"}).json() == {"resumen": "Ok"}
+
+def test_cache_expulsa_por_tamano(tmp_path):
+    cache = cache_resumen.CacheResumenes(str(tmp_path / "c.db"), 2, 3, 3600)
+    cache.PURGA_CADA = 1
+
+    async def llenar():
+        for i in range(5):
+            async def calcular(i=i):
+                return f"resumen {i}"
+            await cache.obtener_o_calcular("m", "", f"texto {i}", calcular)
+
+    asyncio.run(llenar())
+    assert len(cache._memoria) == 2
+    assert cache._db().execute("SELECT COUNT(*) FROM resumenes").fetchone()[0] == 3
+    cache.cerrar()
+
+def test_resumir_lote_en_orden_con_errores(client: TestClient, monkeypatch):
+    en_curso = {"actual": 0, "maximo": 0}
+
+    async def inferir_falso(modelo, payload):
+        en_curso["actual"] += 1
+        en_curso["maximo"] = max(en_curso["maximo"], en_curso["actual"])
+        await asyncio.sleep(0.02 if payload["inputs"] == "uno" else 0.01)
+        en_curso["actual"] -= 1
+        if payload["inputs"] == "falla":
+            return httpx.Response(500, json={"error": "interno"})
+        if payload["inputs"] == "rompe":
+            raise RuntimeError("respuesta inesperada")
+        return httpx.Response(200, json=[{"summary_text": payload["inputs"].upper()}])
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    res = client.post("/resumir/lote", json={"textos": ["uno", "falla", "dos", "rompe", "tres"], "paralelismo": 2})
+    assert res.json()["resultados"] == [
+        {"resumen": "UNO"},
+        {"error": "Error al generar resumen", "detalle": {"error": "interno"}},
+        {"resumen": "DOS"},
+        # Un error no previsto tampoco interrumpe el resto del lote
+        {"error": "Error al generar resumen", "detalle": "respuesta inesperada"},
+        {"resumen": "TRES"},
+    ]
+    assert en_curso["maximo"] == 2
+
+def test_resumen_pdf_lote(client: TestClient, monkeypatch):
+    async def inferir_falso(modelo, payload):
+        return httpx.Response(200, json=[{"generated_text": payload["inputs"].rsplit("\n", 1)[-1]}])
+
+    monkeypatch.setattr(huggingface, "inferir", inferir_falso)
+    res = client.post("/resumen-pdf/lote", files=[
+        ("files", ("a.pdf", pdf_con_texto("Primero"))),
+        ("files", ("b.txt", b"no es pdf")),
+        ("files", ("c.pdf", pdf_con_texto("Tercero"))),
+    ])
+    assert res.json()["resultados"] == [
+        {"archivo": "a.pdf", "resumen": "Primero"},
+        {"archivo": "b.txt", "error": "Solo se permiten archivos PDF"},
+        {"archivo": "c.pdf", "resumen": "Tercero"},
+    ]
+
+TEXTO_FALLO = (
+    "El demandante interpuso recurso de apelación contra la sentencia definitiva. "
+    "La sentencia rechazó la demanda por falta de legitimación activa del demandante. "
+    "El día estaba nublado en la ciudad. "
+    "La corte revisó la legitimación activa y acogió el recurso de apelación del demandante. "
+    "Las costas se fijaron conforme a derecho. "
+    "Se ordenó devolver los autos al tribunal de primera instancia para dictar sentencia."
+)
+
+def test_resumidor_extractivo_elige_oraciones_centrales():
+    resumen = extractivo.resumir(TEXTO_FALLO, oraciones=2)
+    oraciones = extractivo.dividir_oraciones(resumen)
+    assert len(oraciones) == 2
+    assert all(o in TEXTO_FALLO for o in oraciones)
+    assert "nublado" not in resumen
+    # Se conserva el orden original
+    assert TEXTO_FALLO.index(oraciones[0]) < TEXTO_FALLO.index(oraciones[1])
+
+def test_extractivo_filtra_stopwords_con_tilde():
+    oracion = "Según el fallo, también está acreditado que había más daño moral."
+    assert extractivo.terminos(oracion) == ["fallo", "acreditado", "dano", "moral"]
+
+def test_resumidor_exige_implementar_resumir():
+    class SinResumir(Resumidor):
+        nombre = "incompleto"
+
+    with pytest.raises(TypeError):
+        SinResumir()
+
+def test_backend_local_sin_red(client: TestClient, monkeypatch):
+    async def sin_red(modelo, payload):
+        raise AssertionError("no debe llamar a Hugging Face")
+
+    monkeypatch.setattr(huggingface, "inferir", sin_red)
+    res = client.post("/resumir/", json={"texto": TEXTO_FALLO, "backend": "local"})
+    assert res.status_code == 200
+    assert "legitimación activa" in res.json()["resumen"]
+
+    # Por configuración, también para PDFs
+    monkeypatch.setattr(resumidor, "RESUMIDOR_BACKEND", "local")
+    res = client.post("/resumen-pdf/", files={"file": ("fallo.pdf", pdf_con_texto("Sentencia definitiva."))})
+    assert res.json() == {"resumen": "Sentencia definitiva."}
+
+def test_expediente_zip_guarda_documentos(client: TestClient, db_session, headers_para):
+    causa = crud.crear_causa(db_session, schemas.CausaCreate(
+        rit="C-1", representado="Cliente", tribunal="Juzgado Civil",
+        abogado_responsable="ana@example.com", fecha_ingreso=date(2025, 1, 1),
+    ))
+    contenido = io.BytesIO()
+    with zipfile.ZipFile(contenido, "w") as archivo:
+        archivo.writestr("demanda.pdf", pdf_con_texto("Demanda de cobro."))
+        archivo.writestr("anexos/sentencia.pdf", pdf_con_texto("Sentencia definitiva."))
+        archivo.writestr("roto.pdf", b"no es un pdf")
+        archivo.writestr("notas.txt", "se ignora")
+    headers = headers_para("ana@example.com", "abogado")
+
+    res = client.post(
+        f"/causas/{causa.id}/expediente?backend=local",
+        files={"file": ("expediente.zip", contenido.getvalue())},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    cuerpo = res.json()
+    assert [d["nombre_archivo"] for d in cuerpo["documentos"]] == ["demanda.pdf", "anexos/sentencia.pdf"]
+    assert cuerpo["documentos"][1]["resumen"] == "Sentencia definitiva."
+    assert len(cuerpo["errores"]) == 1 and cuerpo["errores"][0].startswith("roto.pdf")
+
+    listados = client.get(f"/causas/{causa.id}/documentos", headers=headers).json()
+    assert len(listados) == 2
+    assert client.post(
+        "/causas/999/expediente", files={"file": ("e.zip", contenido.getvalue())}, headers=headers
+    ).status_code == 404
+
+def test_documentos_deduplicados_entre_causas(client: TestClient, db_session, headers_para):
+    causas = [
+        crud.crear_causa(db_session, schemas.CausaCreate(
+            rit=f"C-{i}", representado="Cliente", tribunal="Juzgado Civil",
+            abogado_responsable="ana@example.com", fecha_ingreso=date(2025, 1, 1),
+        ))
+        for i in (1, 2)
+    ]
+    headers = headers_para("ana@example.com", "abogado")
+    archivo = pdf_con_texto("Escrito comun a ambas causas.")
+    ids = []
+    for causa in causas:
+        res = client.post(
+            f"/causas/{causa.id}/documentos?resumir=false",
+            files={"file": ("escrito.pdf", archivo)},
+            headers=headers,
+        )
+        assert res.status_code == 200
+        ids.append(res.json()["id"])
+
+    assert db_session.query(models.ContenidoDocumento).count() == 1
+    assert len(set(d["hash"] for d in (client.get(f"/documentos/{i}", headers=headers).json() for i in ids))) == 1
+    assert client.get(f"/documentos/{ids[0]}", headers=headers).json()["texto"] == "Escrito comun a ambas causas."
+
+    # El resumen se genera desde el texto guardado y lo comparten ambas causas
+    res = client.post(f"/documentos/{ids[0]}/resumen?backend=local", headers=headers)
+    assert res.json()["resumen"] == "Escrito comun a ambas causas."
+    assert client.get(f"/causas/{causas[1].id}/documentos", headers=headers).json()[0]["resumen"] == "Escrito comun a ambas causas."
+
+    # El texto queda indexado una vez, pero se encuentra desde ambas causas
+    encontrados = client.get("/documentos/buscar", params={"q": "comun causas"}, headers=headers).json()
+    assert sorted(d["id"] for d in encontrados) == sorted(ids)
+    solo_una = client.get("/documentos/buscar", params={"q": "escrito", "causa_id": causas[1].id}, headers=headers).json()
+    assert [d["id"] for d in solo_una] == [ids[1]]
+    assert client.get("/documentos/buscar", params={"q": "inexistente"}, headers=headers).json() == []
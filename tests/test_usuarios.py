@@ -1,7 +1,7 @@
 import json
 import pytest
 from fastapi.testclient import TestClient
-from app import schemas
+from app import crud, crud_async, schemas
 
 def test_registrar_usuario_y_perfil(client: TestClient):
     # 1) Registrar un nuevo usuario (rol admin necesario)
@@ -41,3 +41,30 @@ def test_registrar_usuario_y_perfil(client: TestClient):
     perfil = schemas.UsuarioOut(**res3.json())
     assert perfil.correo == payload["correo"]
     assert perfil.nombre_completo == payload["nombre_completo"]
+
+def test_perfil_cacheado_e_invalidado(client: TestClient, db_session, headers_para, monkeypatch):
+    usuario = crud.crear_usuario(db_session, schemas.UsuarioCreate(
+        nombre_completo="Ana", correo="ana@example.com", password="clave-segura", rol="abogado",
+    ))
+    consultas = []
+    obtener_original = crud_async.obtener_usuario_por_correo
+
+    async def contar(db, correo):
+        consultas.append(correo)
+        return await obtener_original(db, correo)
+
+    monkeypatch.setattr(crud_async, "obtener_usuario_por_correo", contar)
+    headers = headers_para("ana@example.com", "abogado")
+    for _ in range(3):
+        assert client.get("/me", headers=headers).json()["rol"] == "abogado"
+    assert len(consultas) == 1
+
+    # Un cambio de rol o de estado invalida la entrada
+    crud.actualizar_usuario(db_session, usuario.id, activo=False, nuevo_rol="supervisor")
+    perfil = client.get("/me", headers=headers).json()
+    assert (perfil["rol"], perfil["activo"]) == ("supervisor", False)
+    assert len(consultas) == 2
+
+    admin = headers_para("admin@example.com", "admin")
+    assert client.get(f"/usuarios/{usuario.id}", headers=admin).json()["correo"] == "ana@example.com"
+    assert client.get("/usuarios/999", headers=admin).status_code == 404